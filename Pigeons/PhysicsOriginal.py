@@ -1,416 +1,424 @@
 import pygame
-import math
-import random
+import logging
 import time
-import json
 import os
-from datetime import datetime
-
-//test test test
-
-pygame.init()
-pygame.mixer.init()
-pygame.mixer.music.load('music/bgm1.mp3')
-pygame.mixer.music.play(-1)
-
-explode_sound = pygame.mixer.Sound('music/explode1.mp3')
-throw_sound = pygame.mixer.Sound('music/throw1.wav')
-select_sound = pygame.mixer.Sound('music/select1.wav')
-high_score_sound = pygame.mixer.Sound('music/highscore.wav')
-powerup_sound = pygame.mixer.Sound('music/powerup.wav')
-
-WIDTH, HEIGHT = 1280, 720
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pigeons!")
-
-SKY = pygame.image.load('assets/nightcity.png').convert()
-clock = pygame.time.Clock()
-FPS = 60
-GRAVITY = 9.8
-
-birb_frames = [
-    pygame.transform.scale(pygame.image.load(f'assets/brib_f{i+1}.png').convert_alpha(), (50, 40))
-    for i in range(8)
-]
-zombieboy_frames = [
-    pygame.image.load(f'assets/zombieboy{i+1}.png').convert_alpha()
-    for i in range(5)
-]
+from functools import lru_cache
+
+from simulation import (
+    WIDTH, HEIGHT, FPS, boy_pos, POWERUP_TYPES,
+    GameState, Inputs, THROW, HIT, POWERUP, HIGH_SCORE, pool_report,
+)
+from tracerlayer import TracerLayer
+from renderscale import RenderScale
+from leaderboard import open_leaderboard
+from sprites import SpriteCache
+from bundle import AssetBundle
+from atlas import Atlas
+from textcache import TextCache, BoundText
+from dirty import DirtyRects
+from timestep import FixedTimestep, lerp
+from scenes import Scene, SceneManager
+from replay import InputRecorder, Replay, session_path
+from profiler import FrameProfiler
+from assets import AssetLoader
+from soundbank import SoundBank
+from bot import AimBot, SESSION_SECONDS
+
+screen = None
+view = None  # where gameplay is drawn; see PIGEONS_RENDER_SCALE
+SKY = None
+view_sky = None
+clock = None
+font = None
+# Reserved mixer channels per category, so bursts of one kind never cut off another
+sounds = SoundBank({'ui': 1, 'throw': 2, 'hit': 3, 'powerup': 1, 'fanfare': 1}, cache_dir='.cache/sounds')
+sounds.define('select', 'ui')
+sounds.define('throw', 'throw', min_interval=0.05)
+sounds.define('explode', 'hit', min_interval=0.03)  # hits in the same frame make one bang
+sounds.define('powerup', 'powerup', min_interval=0.1)
+sounds.define('high_score', 'fanfare', min_interval=1.0)
+texts = TextCache()
+tracer_layer = None
+hud = {}
+log = logging.getLogger('pigeons')
+sprite_atlas = None  # every gameplay sprite on one sheet; the frames below are Rects on it
+birb_frames = []
+zombieboy_frames = []
+powerup_frames = {}
+stone_frames = {}  # stone scale -> Rect
+sprites = None
+dirty = None  # DirtyRects when PIGEONS_DIRTY is set
+menu = None
+loader = None
+profiler = FrameProfiler()  # F3 or PIGEONS_PROFILE turns it on
+
+FONT_NAME = 'VCR OSD Mono'
+font_path = None  # where the font was found when the bundle was built
+BUNDLE_PATH = 'assets/sprites.bundle'
+
+# Sizes sprites are drawn at, in window pixels
+MENU_BIRD_SIZE = (150, 150)
+BIRD_SIZE = (50, 40)
+ZOMBIEBOY_SIZE = (100, 100)
+POWERUP_SIZE = (80, 80)
+STONE_SIZE = 24
+# Stone scales in play: normal, and whatever a stone_scale power-up makes them
+STONE_SCALES = sorted({1.0} | {info['effect']['stone_scale'] for info in POWERUP_TYPES.values()
+                              if 'stone_scale' in info['effect']})
+
 zombieboy_frame_index = 0
 zombieboy_animating = False
 zombieboy_anim_timer = 0
 zombieboy_anim_speed = 0.07
-
-font = pygame.font.SysFont('VCR OSD Mono', 36)
-boy_pos = (100, HEIGHT - 120)
-angle = 45
-velocity = 50
-stones = []
-birds = []
-score = 0
-stone_count = 20
-stone_img = pygame.transform.scale(pygame.image.load('assets/stone.png').convert_alpha(), (24, 24))
-
-# Add power-up related constants
-POWERUP_DURATION = 5  # seconds
-POWERUP_TYPES = {
-    'red': {'name': '2x Points', 'color': (255, 0, 0), 'image': 'powerup_2x.png'},
-    'blue': {'name': 'Big Stones', 'color': (0, 0, 255), 'image': 'powerup_bigstones.png'},
-    'green': {'name': 'Extra Stones', 'color': (0, 255, 0), 'image': 'powerup_extrastones.png'},
-    'yellow': {'name': 'Slow Motion', 'color': (255, 255, 0), 'image': 'powerup_slow.png'}
-}
-
-# Load powerup images
-powerup_images = {
-    type_name: pygame.transform.scale(pygame.image.load(f'assets/{info["image"]}').convert_alpha(), (80, 80))
-    for type_name, info in POWERUP_TYPES.items()
-}
-
-def load_leaderboard():
-    try:
-        if os.path.exists('leaderboard.json'):
-            with open('leaderboard.json', 'r') as f:
-                return json.load(f)
-    except:
-        pass
-    return []
-
-def save_leaderboard(leaderboard):
-    try:
-        with open('leaderboard.json', 'w') as f:
-            json.dump(leaderboard, f)
-    except:
-        pass
-
-def get_highest_score():
-    leaderboard = load_leaderboard()
-    if leaderboard:
-        return leaderboard[0]['score']  # Leaderboard is already sorted by score
-    return 0
-
-def add_to_leaderboard(name, score):
-    leaderboard = load_leaderboard()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
-    leaderboard.append({
-        'name': name,
-        'score': score,
-        'date': current_time
-    })
-    leaderboard.sort(key=lambda x: x['score'], reverse=True)
-    leaderboard = leaderboard[:5]  # Keep only top 5 scores
-    save_leaderboard(leaderboard)
-    return leaderboard
-
-def get_name_input(screen, font):
-    name = ""
-    input_active = True
-    while input_active:
+BIRD_FRAME_TIME = 0.08
+
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    if font_path:
+        return pygame.font.Font(font_path, size)
+    return pygame.font.SysFont(FONT_NAME, size)
+
+
+def init_display(render_scale=1.0):
+    global screen, view, tracer_layer, clock
+    pygame.init()
+    pygame.mixer.init()
+    sounds.reserve()
+    # Gameplay draws at the internal resolution; menus at full size on the canvas
+    view = RenderScale.open((WIDTH, HEIGHT), render_scale)
+    screen = view.canvas
+    tracer_layer = TracerLayer(view.surface.get_size(), view.length(6), render_scale)
+    pygame.display.set_caption("Pigeons!")
+    clock = pygame.time.Clock()
+
+
+# Load priorities: what the menu needs comes off the disk first
+MENU_ASSETS = 0
+GAME_ASSETS = 1
+
+def queue_assets():
+    """Start loading every asset on the worker thread and return the loader."""
+    global sprites, loader, font_path
+    bundle = AssetBundle.open(BUNDLE_PATH, view.scale)
+    sprites = SpriteCache('assets', bundle=bundle)
+    loader = AssetLoader(sprites, sounds)
+    font_path = bundle.font_path(FONT_NAME) if bundle else None
+    if font_path is None:
+        loader.add_font(FONT_NAME, MENU_ASSETS)
+    loader.add_image('nightcity.png', 'assets/nightcity.png', MENU_ASSETS, alpha=False)
+    loader.add_image('brib_f1.png', 'assets/brib_f1.png', MENU_ASSETS)
+    loader.add_sound('select', 'music/select1.wav', MENU_ASSETS)
+    loader.add_music('music/bgm1.mp3', MENU_ASSETS)
+
+    for i in range(1, 8):
+        loader.add_image(f'brib_f{i+1}.png', f'assets/brib_f{i+1}.png', GAME_ASSETS)
+    for i in range(5):
+        loader.add_image(f'zombieboy{i+1}.png', f'assets/zombieboy{i+1}.png', GAME_ASSETS)
+    for info in POWERUP_TYPES.values():
+        loader.add_image(info['image'], f'assets/{info["image"]}', GAME_ASSETS)
+    loader.add_image('stone.png', 'assets/stone.png', GAME_ASSETS)
+    loader.add_sound('explode', 'music/explode1.mp3', GAME_ASSETS)
+    loader.add_sound('throw', 'music/throw1.wav', GAME_ASSETS)
+    loader.add_sound('high_score', 'music/highscore.wav', GAME_ASSETS)
+    loader.add_sound('powerup', 'music/powerup.wav', GAME_ASSETS)
+    loader.start()
+    return loader
+
+def setup_menu_assets():
+    global SKY, view_sky, font
+    SKY = sprites.get('nightcity.png', alpha=False)
+    view_sky = sprites.get('nightcity.png', view.size(SKY.get_size()), alpha=False)
+    font = get_font(36)
+
+def setup_game_assets():
+    global sprite_atlas, birb_frames, zombieboy_frames, powerup_frames, stone_frames
+    if sprite_atlas:
+        return
+    sprite_atlas = Atlas.pack(sprites, atlas_manifest())
+    birb_frames = sprite_atlas.frames('bird')
+    zombieboy_frames = sprite_atlas.frames('zombieboy')
+    powerup_frames = {type_name: sprite_atlas.frames(f'powerup_{type_name}')[0] for type_name in POWERUP_TYPES}
+    stone_frames = dict(zip(STONE_SCALES, sprite_atlas.frames('stone')))
+    log.debug("sprite atlas %s: %s", sprite_atlas.surface.get_size(), sprite_atlas.describe())
+    hud_font = get_font(view.length(36))
+    hud.update(
+        angle_shadow=BoundText(texts, hud_font, "Angle: {}°  Velocity: {}  Score: ", (0, 0, 0)),
+        angle=BoundText(texts, hud_font, "Angle: {}°  Velocity: {}  Score: ", (255, 255, 255)),
+        score=BoundText(texts, hud_font, "{}", (0, 255, 0)),  # Green color
+        high_score_shadow=BoundText(texts, hud_font, "Stones: {}  High Score: {}", (0, 0, 0)),
+        high_score=BoundText(texts, hud_font, "Stones: {}  High Score: {}", (255, 255, 0)),  # Yellow color
+    )
+    for type_name, info in POWERUP_TYPES.items():
+        hud[type_name] = BoundText(texts, hud_font, "{}: {:.1f}s", info['color'])
+    for name, size, read_ms, decode_ms, finish_ms in loader.report():
+        log.info("%-24s %8d B  read %6.1f ms  decode %6.1f ms  convert %6.1f ms",
+                 name, size, read_ms, decode_ms, finish_ms)
+
+def atlas_manifest():
+    """Frame sequences of the gameplay sprite atlas, as (asset, size) at this render scale."""
+    manifest = {
+        'bird': [(f'brib_f{i+1}.png', view.size(BIRD_SIZE)) for i in range(8)],
+        'zombieboy': [(f'zombieboy{i+1}.png', view.size(ZOMBIEBOY_SIZE)) for i in range(5)],
+        'stone': [('stone.png', stone_size(scale)) for scale in STONE_SCALES],
+    }
+    for type_name, info in POWERUP_TYPES.items():
+        manifest[f'powerup_{type_name}'] = [(info['image'], view.size(POWERUP_SIZE))]
+    return manifest
+
+def bundled_sprites(sprites):
+    """(asset, size, alpha) of every sprite the game draws at this render scale, for bundle.py."""
+    wanted = [('nightcity.png', None, False), ('brib_f1.png', MENU_BIRD_SIZE, True)]
+    if view.scaled:
+        wanted.append(('nightcity.png', view.size(sprites.get('nightcity.png', alpha=False).get_size()), False))
+    wanted += [(asset, size, True) for frames in atlas_manifest().values() for asset, size in frames]
+    return wanted
+
+def load_assets():
+    """Load everything up front, without a progress screen."""
+    queue_assets().wait()
+    setup_menu_assets()
+    setup_game_assets()
+
+class MenuScene(Scene):
+    """A screen drawn at full size on the canvas rather than on the view."""
+
+    def present(self):
+        view.present_canvas()
+
+class LoadingScreen(MenuScene):
+    fps = 30
+
+    def __init__(self, loader, priority, next_scene):
+        super().__init__()
+        self.loader = loader
+        self.priority = priority
+        self.next_scene = next_scene
+        # The default font needs no system font scan
+        self.font = pygame.font.Font(None, 36)
+
+    def update(self, elapsed):
+        self.loader.poll()
+        if self.loader.ready(self.priority):
+            self.manager.switch(self.next_scene())
+
+    def draw(self, screen):
+        screen.fill((0, 0, 0))
+        bar = pygame.Rect(0, 0, WIDTH // 2, 24)
+        bar.center = (WIDTH // 2, HEIGHT // 2)
+        pygame.draw.rect(screen, (255, 255, 255), bar, 2)
+        filled = bar.inflate(-8, -8)
+        filled.width = int(filled.width * self.loader.progress)
+        pygame.draw.rect(screen, (255, 255, 0), filled)
+        text = self.font.render(f"Loading... {int(self.loader.progress * 100)}%", True, (255, 255, 255))
+        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, bar.top - 50))
+
+class NameEntryScreen(MenuScene):
+    def __init__(self, score, background, board):
+        super().__init__()
+        self.score = score
+        self.background = background
+        self.board = board
+        self.name = ""
+
+    def draw(self, screen):
         screen.fill((0, 0, 0))
-        prompt = font.render("Enter your name:", True, (255, 255, 255))
-        name_text = font.render(name + "|", True, (255, 255, 255))
-        continue_text = font.render("Press ENTER to continue", True, (255, 255, 255))
-        
+        prompt = texts.render(font, "Enter your name:", (255, 255, 255))
+        name_text = texts.render(font, self.name + "|", (255, 255, 255))
+        continue_text = texts.render(font, "Press ENTER to continue", (255, 255, 255))
+
         screen.blit(prompt, (WIDTH//2 - prompt.get_width()//2, HEIGHT//2 - 50))
         screen.blit(name_text, (WIDTH//2 - name_text.get_width()//2, HEIGHT//2))
         screen.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 50))
-        
-        pygame.display.flip()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and name:
-                    input_active = False
-                elif event.key == pygame.K_BACKSPACE:
-                    name = name[:-1]
-                elif len(name) < 10 and event.unicode.isalnum():
-                    name += event.unicode
-    return name
-
-class PowerUp:
-    def __init__(self, type_name):
-        self.type = type_name
-        self.start_time = time.time()
-        self.active = True
-    
-    def is_expired(self):
-        return time.time() - self.start_time > POWERUP_DURATION
-
-class Bird:
-    def __init__(self):
-        self.x = WIDTH
-        self.y = random.randint(100, 300)
-        self.original_speed = random.uniform(2, 5)
-        self.speed = self.original_speed
-        self.radius = 20
-        self.frame_index = 0
-        self.last_anim_time = time.time()
-        # Randomly assign power-up type to some birds
-        self.powerup_type = random.choice(list(POWERUP_TYPES.keys())) if random.random() < 0.2 else None
-        
-        if self.powerup_type:
-            # Use the powerup image
-            self.image = powerup_images[self.powerup_type]
-            self.frames = [self.image]  # Single frame for power-up birds
-            self.rect = self.image.get_rect(topleft=(self.x, self.y))
-        else:
-            # Regular bird animation
-            self.frames = birb_frames
-            self.image = self.frames[self.frame_index]
-            self.rect = self.image.get_rect(topleft=(self.x, self.y))
-
-    def move(self):
-        self.x -= self.speed
-        self.rect.x = int(self.x)
-        
-        # Only animate if it's a regular bird
-        if not self.powerup_type:
-            now = time.time()
-            if now - self.last_anim_time > 0.08:
-                self.frame_index = (self.frame_index + 1) % len(self.frames)
-                self.image = self.frames[self.frame_index]
-                self.last_anim_time = now
-
-    def draw(self):
-        screen.blit(self.image, self.rect)
-
-class Stone:
-    def __init__(self, angle, velocity):
-        self.x = boy_pos[0] + 90
-        self.y = boy_pos[1] + 7
-        self.angle = math.radians(angle)
-        self.velocity = velocity
-        self.time = 0
-        self.image = stone_img
-    def update(self):
-        t = self.time
-        self.x = boy_pos[0] + 90 + self.velocity * math.cos(self.angle) * t
-        self.y = boy_pos[1] + 7 - (self.velocity * math.sin(self.angle) * t - 0.5 * GRAVITY * t ** 2)
-        self.time += 0.1
-    def draw(self):
-        rect = self.image.get_rect(center=(int(self.x), int(self.y)))
-        screen.blit(self.image, rect)
-    def is_off_screen(self):
-        return self.x > WIDTH or self.y > HEIGHT or self.y < 0
-
-def check_collision(stone, bird):
-    # Get the center points of both objects
-    stone_center = (stone.x, stone.y)
-    if bird.powerup_type:
-        # For powerups, use the center of the 80x80 image
-        bird_center = (bird.x + 40, bird.y + 40)
-        collision_radius = 40  # Half of the powerup image size
-    else:
-        # For regular birds, use the original collision radius
-        bird_center = (bird.x + 25, bird.y + 20)
-        collision_radius = 28
-    
-    # Calculate distance between centers
-    dx = stone_center[0] - bird_center[0]
-    dy = stone_center[1] - bird_center[1]
-    distance = math.hypot(dx, dy)
-    
-    return distance < collision_radius
-
-class LeaderboardScreen:
-    def __init__(self, screen, width, height):
-        self.screen = screen
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN and self.name:
+                leaderboard = self.board.add(self.name, self.score)
+                self.manager.switch(GameOverScreen(self.score, self.background, leaderboard))
+            elif event.key == pygame.K_BACKSPACE:
+                self.name = self.name[:-1]
+            elif len(self.name) < 10 and event.unicode.isalnum():
+                self.name += event.unicode
+            self.invalidate()
+
+class GameOverScreen(MenuScene):
+    def __init__(self, score, background, leaderboard):
+        super().__init__()
+        self.score = score
+        self.background = background
+        self.leaderboard = leaderboard
+
+    def draw(self, screen):
+        screen.blit(self.background, (0, 0))
+
+        # Create a semi-transparent overlay
+        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 128))
+        screen.blit(overlay, (0, 0))
+
+        # Game over text
+        game_over_font = get_font(72)
+        score_font = get_font(48)
+
+        game_over_text = texts.render(game_over_font, "Game Over!", (255, 0, 0))
+        final_score_text = texts.render(score_font, f"Final Score: {self.score}", (255, 255, 255))
+        continue_text = texts.render(score_font, "Press SPACE to continue", (255, 255, 255))
+
+        # Center all text
+        x = WIDTH // 2
+        y = HEIGHT // 2 - 100
+
+        screen.blit(game_over_text, (x - game_over_text.get_width() // 2, y))
+        screen.blit(final_score_text, (x - final_score_text.get_width() // 2, y + 80))
+        screen.blit(continue_text, (x - continue_text.get_width() // 2, y + 200))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            # Show leaderboard, then back to the menu
+            self.manager.switch(LeaderboardScreen(WIDTH, HEIGHT, self.leaderboard, menu))
+
+class LeaderboardScreen(MenuScene):
+    def __init__(self, width, height, leaderboard, next_scene):
+        super().__init__()
         self.width = width
         self.height = height
-        self.title_font = pygame.font.SysFont('VCR OSD Mono', 72)
-        self.score_font = pygame.font.SysFont('VCR OSD Mono', 36)
-        self.date_font = pygame.font.SysFont('VCR OSD Mono', 24)
-        self.continue_font = pygame.font.SysFont('VCR OSD Mono', 36)
-    
-    def draw(self, leaderboard):
-        self.screen.fill((0, 0, 0))
-        
+        self.leaderboard = leaderboard
+        self.next_scene = next_scene
+        self.title_font = get_font(72)
+        self.score_font = get_font(36)
+        self.date_font = get_font(24)
+        self.continue_font = get_font(36)
+
+    def draw(self, screen):
+        screen.fill((0, 0, 0))
+
         # Draw title
-        title = self.title_font.render("Leaderboard", True, (255, 255, 255))
-        self.screen.blit(title, (self.width//2 - title.get_width()//2, 50))
-        
+        title = texts.render(self.title_font, "Leaderboard", (255, 255, 255))
+        screen.blit(title, (self.width//2 - title.get_width()//2, 50))
+
         # Draw column headers
         headers = ["Rank", "Name", "Score", "Date"]
         header_x = [self.width//2 - 250, self.width//2 - 150, self.width//2 + 50, self.width//2 + 200]
         for i, header in enumerate(headers):
-            header_text = self.score_font.render(header, True, (255, 255, 0))
-            self.screen.blit(header_text, (header_x[i], 120))
-        
+            header_text = texts.render(self.score_font, header, (255, 255, 0))
+            screen.blit(header_text, (header_x[i], 120))
+
         # Draw scores
         y = 180
-        for i, entry in enumerate(leaderboard):
+        for i, entry in enumerate(self.leaderboard):
             rank = f"{i+1}."
             name = entry['name']
             score = str(entry['score'])
             date = entry.get('date', 'N/A')
-            
-            rank_text = self.score_font.render(rank, True, (255, 255, 0))
-            name_text = self.score_font.render(name, True, (255, 255, 255))
-            score_text = self.score_font.render(score, True, (255, 255, 255))
-            date_text = self.date_font.render(date, True, (200, 200, 200))
-            
-            self.screen.blit(rank_text, (header_x[0], y))
-            self.screen.blit(name_text, (header_x[1], y))
-            self.screen.blit(score_text, (header_x[2], y))
-            self.screen.blit(date_text, (header_x[3], y))
+
+            rank_text = texts.render(self.score_font, rank, (255, 255, 0))
+            name_text = texts.render(self.score_font, name, (255, 255, 255))
+            score_text = texts.render(self.score_font, score, (255, 255, 255))
+            date_text = texts.render(self.date_font, date, (200, 200, 200))
+
+            screen.blit(rank_text, (header_x[0], y))
+            screen.blit(name_text, (header_x[1], y))
+            screen.blit(score_text, (header_x[2], y))
+            screen.blit(date_text, (header_x[3], y))
             y += 60
-        
+
         # Draw continue text
-        continue_text = self.continue_font.render("Press SPACE to continue", True, (255, 255, 255))
-        self.screen.blit(continue_text, (self.width//2 - continue_text.get_width()//2, self.height - 100))
-        
-        pygame.display.flip()
-    
-    def run(self, leaderboard):
-        self.draw(leaderboard)
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    waiting = False
-
-class Menu:
-    def __init__(self, screen, sky, width, height, select_sound=None):
-        self.screen = screen
+        continue_text = texts.render(self.continue_font, "Press SPACE to continue", (255, 255, 255))
+        screen.blit(continue_text, (self.width//2 - continue_text.get_width()//2, self.height - 100))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            self.manager.switch(self.next_scene)
+
+class Menu(MenuScene):
+    @property
+    def idle_timeout(self):
+        # Wake up often while the game's assets are still loading behind us
+        return 1000 if loader.done else 20
+
+    def __init__(self, sky, width, height, board, select_sound=None, new_game=None):
+        super().__init__()
         self.sky = sky
+        self.board = board
         self.width = width
         self.height = height
         self.select_sound = select_sound
-        self.title_font = pygame.font.SysFont('VCR OSD Mono', 72)
-        self.button_font = pygame.font.SysFont('VCR OSD Mono', 48)
+        self.new_game = new_game
+        self.title_font = get_font(72)
+        self.button_font = get_font(48)
         self.options = ['Start', 'Leaderboard', 'Quit']
         self.selected_idx = 0
-    def draw(self):
-        self.screen.blit(self.sky, (0, 0))
-        title = self.title_font.render('Pigeons!', True, (255, 255, 255))
-        pigeon_img = pygame.transform.scale(birb_frames[0], (150, 150))
+
+    def draw(self, screen):
+        screen.blit(self.sky, (0, 0))
+        title = texts.render(self.title_font, 'Pigeons!', (255, 255, 255))
+        pigeon_img = sprites.get('brib_f1.png', MENU_BIRD_SIZE)
         total_width = title.get_width() + pigeon_img.get_width() + 10
         title_x = self.width // 2 - total_width // 2
         title_y = self.height // 4
-        self.screen.blit(title, (title_x, title_y))
-        self.screen.blit(pigeon_img, (title_x + title.get_width() + 10, title_y + (title.get_height() - pigeon_img.get_height()) // 2))
+        screen.blit(title, (title_x, title_y))
+        screen.blit(pigeon_img, (title_x + title.get_width() + 10, title_y + (title.get_height() - pigeon_img.get_height()) // 2))
         for i, text in enumerate(self.options):
             color = (255, 255, 0) if i == self.selected_idx else (255, 255, 255)
-            option_text = self.button_font.render(text, True, color)
+            option_text = texts.render(self.button_font, text, color)
             rect = option_text.get_rect(center=(self.width // 2, self.height // 2 + i * 100))
-            pygame.draw.rect(self.screen, (0, 0, 0), rect.inflate(40, 20))
-            self.screen.blit(option_text, rect)
-        pygame.display.flip()
-    def run(self):
-        while True:
-            self.draw()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_UP:
-                        if self.select_sound:
-                            self.select_sound.play()
-                        self.selected_idx = (self.selected_idx - 1) % len(self.options)
-                    elif event.key == pygame.K_DOWN:
-                        if self.select_sound:
-                            self.select_sound.play()
-                        self.selected_idx = (self.selected_idx + 1) % len(self.options)
-                    elif event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                        if self.selected_idx == 0:
-                            return 'start'
-                        elif self.selected_idx == 1:
-                            leaderboard_screen = LeaderboardScreen(self.screen, self.width, self.height)
-                            leaderboard_screen.run(load_leaderboard())
-                        elif self.selected_idx == 2:
-                            pygame.quit()
-                            exit()
-
-def reset_game_variables():
-    global angle, velocity, stones, birds, score, stone_count, zombieboy_frame_index, zombieboy_animating, zombieboy_anim_timer, high_score_achieved, active_powerups
-    angle = 45
-    velocity = 50
-    stones = []
-    birds = []
-    score = 0
-    stone_count = 20
-    zombieboy_frame_index = 0
-    zombieboy_animating = False
-    zombieboy_anim_timer = 0
-    high_score_achieved = False
-    active_powerups = []  # Reset active power-ups
-
-menu = Menu(screen, SKY, WIDTH, HEIGHT, select_sound)
-menu_result = menu.run()
-reset_game_variables()
-running = menu_result == 'start'
-bird_spawn_timer = 0
-high_score_achieved = False
-active_powerups = []  # Initialize active power-ups list
-
-while running:
-    screen.blit(SKY, (0, 0))
-    clock.tick(FPS)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+            pygame.draw.rect(screen, (0, 0, 0), rect.inflate(40, 20))
+            screen.blit(option_text, rect)
+
+    def update(self, elapsed):
+        if not loader.done:
+            loader.poll()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                if self.select_sound:
+                    self.select_sound.play()
+                self.selected_idx = (self.selected_idx - 1) % len(self.options)
+                self.invalidate()
+            elif event.key == pygame.K_DOWN:
+                if self.select_sound:
+                    self.select_sound.play()
+                self.selected_idx = (self.selected_idx + 1) % len(self.options)
+                self.invalidate()
+            elif event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
+                if self.selected_idx == 0:
+                    self.manager.switch(self.new_game())
+                elif self.selected_idx == 1:
+                    self.manager.switch(LeaderboardScreen(self.width, self.height, self.board.top(), self))
+                elif self.selected_idx == 2:
+                    self.manager.quit()
+
+def read_inputs():
     keys = pygame.key.get_pressed()
-    if keys[pygame.K_UP]:
-        angle = min(angle + 1, 90)
-    if keys[pygame.K_DOWN]:
-        angle = max(angle - 1, 1)
-    if keys[pygame.K_RIGHT]:
-        velocity = min(velocity + 1, 150)
-    if keys[pygame.K_LEFT]:
-        velocity = max(velocity - 1, 10)
-    if keys[pygame.K_SPACE]:
-        if stone_count > 0 and (len(stones) == 0 or stones[-1].time > 0.5):
-            stones.append(Stone(angle, velocity))
-            throw_sound.play()
-            stone_count -= 1
+    return Inputs(
+        up=keys[pygame.K_UP],
+        down=keys[pygame.K_DOWN],
+        left=keys[pygame.K_LEFT],
+        right=keys[pygame.K_RIGHT],
+        space=keys[pygame.K_SPACE],
+    )
+
+EVENT_SOUNDS = {THROW: 'throw', HIT: 'explode', POWERUP: 'powerup', HIGH_SCORE: 'high_score'}
+
+def play_events(events):
+    global zombieboy_frame_index, zombieboy_animating, zombieboy_anim_timer
+    for event in events:
+        sounds.play(EVENT_SOUNDS[event])
+        if event == THROW:
             zombieboy_animating = True
             zombieboy_frame_index = 0
             zombieboy_anim_timer = time.time()
-    bird_spawn_timer += 1
-    if bird_spawn_timer > 90:
-        birds.append(Bird())
-        bird_spawn_timer = 0
-    for bird in birds[:]:
-        bird.move()
-        bird.draw()
-        if bird.x < -50:
-            birds.remove(bird)
-    for stone in stones[:]:
-        stone.update()
-        stone.draw()
-        if stone.is_off_screen():
-            stones.remove(stone)
-            continue
-        for bird in birds[:]:
-            if check_collision(stone, bird):
-                explode_sound.play()
-                # Check for power-up activation
-                if bird.powerup_type:
-                    powerup_sound.play()
-                    active_powerups.append(PowerUp(bird.powerup_type))
-                birds.remove(bird)
-                stones.remove(stone)
-                # Apply power-up effects
-                points = 100
-                for powerup in active_powerups:
-                    if powerup.type == 'red':  # 2x Points
-                        points *= 2
-                score += points
-                if score > get_highest_score() and not high_score_achieved:
-                    high_score_sound.play()
-                    high_score_achieved = True
-                # Apply other power-up effects
-                for powerup in active_powerups:
-                    if powerup.type == 'green':  # Extra Stones
-                        stone_count += 1
-                stone_count += 1
-                break
+
+def reset_zombieboy():
+    global zombieboy_frame_index, zombieboy_animating, zombieboy_anim_timer
+    zombieboy_frame_index = 0
+    zombieboy_animating = False
+    zombieboy_anim_timer = 0
+
+def animate_zombieboy():
+    global zombieboy_frame_index, zombieboy_animating, zombieboy_anim_timer
     if zombieboy_animating:
         now = time.time()
         if zombieboy_frame_index < len(zombieboy_frames) - 1:
@@ -420,134 +428,243 @@ while running:
         else:
             zombieboy_animating = False
             zombieboy_frame_index = 0
-    zombieboy_img = pygame.transform.scale(zombieboy_frames[zombieboy_frame_index], (100, 100))
-    screen.blit(zombieboy_img, boy_pos)
-    tracer_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    tracer_points = []
-    tracer_x = boy_pos[0] + 90
-    tracer_y = boy_pos[1] + 7
-    tracer_angle = math.radians(angle)
-    tracer_velocity = velocity
-    t = 0
-    while True:
-        x = tracer_x + tracer_velocity * math.cos(tracer_angle) * t
-        y = tracer_y - (tracer_velocity * math.sin(tracer_angle) * t - 0.5 * GRAVITY * t ** 2)
-        if x > WIDTH or y > HEIGHT or y < 0:
-            break
-        tracer_points.append((int(x), int(y)))
-        t += 0.05
-    for i, point in enumerate(tracer_points):
-        if i % 7 == 0:
-            alpha = max(0, 180 - int(120 * (i / len(tracer_points))))
-            tracer_color = (255, 255, 255, alpha)
-            tracer_circle = pygame.Surface((12, 12), pygame.SRCALPHA)
-            pygame.draw.circle(tracer_circle, tracer_color, (6, 6), 6)
-            tracer_surface.blit(tracer_circle, (point[0] - 6, point[1] - 6))
-    screen.blit(tracer_surface, (0, 0))
-    if stone_count == 0 and len(stones) == 0 and not any([stone for stone in stones]):
-        leaderboard = load_leaderboard()
-        if score > 0 and (len(leaderboard) < 5 or score > leaderboard[-1]['score']):
-            name = get_name_input(screen, font)
-            leaderboard = add_to_leaderboard(name, score)
-        
-        # Create a semi-transparent overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
-        
-        # Game over text
-        game_over_font = pygame.font.SysFont('VCR OSD Mono', 72)
-        score_font = pygame.font.SysFont('VCR OSD Mono', 48)
-        
-        game_over_text = game_over_font.render("Game Over!", True, (255, 0, 0))
-        final_score_text = score_font.render(f"Final Score: {score}", True, (255, 255, 255))
-        continue_text = score_font.render("Press SPACE to continue", True, (255, 255, 255))
-        
-        # Center all text
-        x = WIDTH // 2
-        y = HEIGHT // 2 - 100
-        
-        screen.blit(game_over_text, (x - game_over_text.get_width() // 2, y))
-        screen.blit(final_score_text, (x - final_score_text.get_width() // 2, y + 80))
-        screen.blit(continue_text, (x - continue_text.get_width() // 2, y + 200))
-        
-        pygame.display.flip()
-        
-        # Wait for space key
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    waiting = False
-        
-        # Show leaderboard
-        leaderboard_screen = LeaderboardScreen(screen, WIDTH, HEIGHT)
-        leaderboard_screen.run(leaderboard)
-        
-        reset_game_variables()
-        menu.selected_idx = 0
-        menu_result = menu.run()
-        running = menu_result == 'start'
-        continue
-
-    # Update active power-ups
-    active_powerups = [p for p in active_powerups if not p.is_expired()]
-    
-    # Apply power-up effects to stone size
-    stone_scale = 1.0
-    for powerup in active_powerups:
-        if powerup.type == 'blue':  # Big Stones
-            stone_scale = 2.0
-            break
-
-    # Apply power-up effects to game speed
-    game_speed = 1.0
-    for powerup in active_powerups:
-        if powerup.type == 'yellow':  # Slow Motion
-            game_speed = 0.5
-            break
-
-    # Update stone size based on power-up
-    stone_img = pygame.transform.scale(pygame.image.load('assets/stone.png').convert_alpha(), 
-                                    (int(24 * stone_scale), int(24 * stone_scale)))
-
-    # Instead, apply speed to bird movement
-    for bird in birds:
-        bird.speed = bird.original_speed * game_speed
-
-    # Update the info display to get the current highest score
-    angle_text = f"Angle: {angle}°  Velocity: {velocity}  Score: "
-    score_text = f"{score}"
-    high_score_text = f"Stones: {stone_count}  High Score: {get_highest_score()}"
-    
-    # Render each part with its own color
-    angle_shadow = font.render(angle_text, True, (0, 0, 0))
-    high_score_shadow = font.render(high_score_text, True, (0, 0, 0))
-    
-    angle_info = font.render(angle_text, True, (255, 255, 255))
-    score_info = font.render(score_text, True, (0, 255, 0))  # Green color
-    high_score_info = font.render(high_score_text, True, (255, 255, 0))  # Yellow color
-    
+
+def bird_frame(bird, now):
+    if bird.powerup_type:
+        return powerup_frames[bird.powerup_type]
+    # Regular bird animation
+    return birb_frames[int((now - bird.spawn_time) / BIRD_FRAME_TIME) % len(birb_frames)]
+
+def stone_size(scale):
+    # Big Stones doubles the size of stones thrown while it is active
+    return view.size((int(STONE_SIZE * scale), int(STONE_SIZE * scale)))
+
+def blit(surface, dest, area=None):
+    rect = view.surface.blit(surface, dest, area)
+    if dirty:
+        dirty.add(rect)
+    return rect
+
+def blits(batch):
+    if dirty:
+        for rect in view.surface.blits(batch):
+            dirty.add(rect)
+    else:
+        view.surface.blits(batch, doreturn=False)
+
+def begin_frame():
+    if dirty:
+        dirty.restore()
+    else:
+        view.surface.blit(view_sky, (0, 0))
+
+def present():
+    if dirty:
+        dirty.present()
+    else:
+        view.present()
+
+def draw_game(state, alpha=1.0):
+    # alpha is how far the render time is between the last two physics ticks
+    begin_frame()
+    sheet = sprite_atlas.surface
+    # Birds and stones all come off the atlas, so they go out in one blits() call
+    batch = [(sheet, view.point(lerp(bird.prev_x, bird.x, alpha), bird.y), bird_frame(bird, state.time))
+             for bird in state.birds]
+    for stone in state.stones:
+        frame = stone_frames[stone.scale]
+        x, y = view.point(lerp(stone.prev_x, stone.x, alpha), lerp(stone.prev_y, stone.y, alpha))
+        batch.append((sheet, (x - frame.width // 2, y - frame.height // 2), frame))
+    blits(batch)
+    animate_zombieboy()
+    blit(sheet, view.point(*boy_pos), zombieboy_frames[zombieboy_frame_index])
+    with profiler.phase('tracer'):
+        draw_tracer(state)
+
+def draw_tracer(state):
+    rect = tracer_layer.draw(view.surface, state.angle, state.velocity)
+    if rect and dirty:
+        dirty.add(rect)
+
+def draw_hud(state, high_score):
+    # Only lines whose values changed since the last frame get re-rendered
+    angle_values = (state.angle, state.velocity)
+    high_score_values = (state.stone_count, high_score)
+    angle_shadow = hud['angle_shadow'].update(*angle_values)
+    hud['high_score_shadow'].update(*high_score_values)
+
+    angle_info = hud['angle'].update(*angle_values)
+    score_info = hud['score'].update(state.score)
+    high_score_info = hud['high_score'].update(*high_score_values)
+
+    # Offsets are in window pixels, scaled like everything else on the view
+    left, top, shadow, gap = view.length(10), view.length(10), view.length(4), view.length(5)
+
     # Draw shadows for angle and high score only
-    screen.blit(angle_shadow, (10, 14))  # Align left
-    screen.blit(high_score_shadow, (10, 14 + angle_shadow.get_height() + 5))  # Align left
+    blit(angle_shadow, (left, top + shadow))  # Align left
+    blit(hud['high_score_shadow'].surface, (left, top + shadow + angle_shadow.get_height() + gap))  # Align left
 
     # Draw colored text
-    screen.blit(angle_info, (10, 10))
-    screen.blit(score_info, (10 + angle_info.get_width(), 10))
-    screen.blit(high_score_info, (10, 10 + angle_info.get_height() + 5))  # Align left
-
-    # Draw active power-ups
-    powerup_y = 50 + angle_info.get_height() + 5  # Move powerups below high score
-    for powerup in active_powerups:
-        remaining_time = POWERUP_DURATION - (time.time() - powerup.start_time)
-        powerup_text = f"{POWERUP_TYPES[powerup.type]['name']}: {remaining_time:.1f}s"
-        powerup_surface = font.render(powerup_text, True, POWERUP_TYPES[powerup.type]['color'])
-        screen.blit(powerup_surface, (10, powerup_y))
-        powerup_y += 30
-
-    pygame.display.flip()
-pygame.quit()
\ No newline at end of file
+    blit(angle_info, (left, top))
+    blit(score_info, (left + angle_info.get_width(), top))
+    blit(high_score_info, (left, top + angle_info.get_height() + gap))  # Align left
+
+    # Draw active power-ups, re-rendered only when the tenths digit ticks
+    powerup_y = view.length(50) + angle_info.get_height() + gap  # Move powerups below high score
+    for powerup in state.active_powerups:
+        remaining_time = round(powerup.remaining(state.time), 1)
+        powerup_surface = hud[powerup.type].update(POWERUP_TYPES[powerup.type]['name'], remaining_time)
+        blit(powerup_surface, (left, powerup_y))
+        powerup_y += view.length(30)
+
+class GameplayScreen(Scene):
+    def __init__(self, board, backend='python', tick_rate=FPS, render_fps=FPS, time_scale=1.0,
+                 record_path=None, replay=None, bot=None):
+        super().__init__()
+        self.board = board
+        self.fps = render_fps
+        self.recorder = None
+        # bot is the AimBot accuracy, or None to read the keyboard
+        self.bot = bot
+        self.replay = replay
+        self.restart = lambda: GameplayScreen(board, backend, tick_rate, render_fps, time_scale, record_path, bot=bot)
+        if replay:
+            # Ticks only line up with the recording at its own tick rate
+            tick_rate = replay.tick_rate
+            self.state = replay.new_state(backend)
+            self.input_source = replay.next_inputs
+        else:
+            high_score = board.highest_score()
+            seed = int.from_bytes(os.urandom(8), 'little')
+            self.state = GameState(high_score=high_score, seed=seed, backend=backend)
+            if bot is None:
+                self.input_source = read_inputs
+            else:
+                self.input_source = AimBot(self.state, tick_rate, bot, seed)
+            if record_path:
+                self.recorder = InputRecorder(session_path(record_path, seed), seed, tick_rate, high_score)
+        self.timestep = FixedTimestep(tick_rate=tick_rate, time_scale=time_scale)
+
+    def enter(self):
+        setup_game_assets()
+        reset_zombieboy()
+        if dirty:
+            dirty.invalidate()
+
+    def leave(self):
+        if self.recorder:
+            self.recorder.save(self.state.score)
+            log.info("recorded %s", self.recorder.path)
+            self.recorder = None
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.toggle()
+
+    def update(self, elapsed):
+        state = self.state
+        state.profiler = profiler
+        profiler.begin_frame()
+        for _ in range(self.timestep.advance(elapsed)):
+            with profiler.phase('input'):
+                inputs = self.input_source()
+                if self.recorder:
+                    self.recorder.record(inputs)
+            with profiler.phase('step'):
+                events = state.step(inputs, self.timestep.dt)
+            play_events(events)
+            if (state.game_over or (self.replay and self.replay.finished)
+                    or (self.bot is not None and state.time >= SESSION_SECONDS)):
+                self.finish()
+                return
+
+    def finish(self):
+        # The game-over overlay goes on top of the final frame, minus the HUD
+        draw_game(self.state)
+        background = view.snapshot()
+        score = self.state.score
+        for line in pool_report():
+            log.info("pool %s", line)
+        log.info("sounds played/dropped %s", sounds.stats())
+        if self.timestep.dropped_time:
+            log.info("dropped %.2f s of simulation time to slow frames", self.timestep.dropped_time)
+        menu.selected_idx = 0
+        if self.bot is not None:
+            # Soak testing: keep the leaderboard writes, skip the screens
+            log.info("bot session over with score %d", score)
+            if self.board.qualifies(score):
+                self.board.add('BOT', score)
+            self.manager.switch(self.restart())
+        elif self.replay:
+            # The game was played before; its score is on the board already if it made it
+            log.info("replay over with score %d (recorded %d)", score, self.replay.final_score)
+            self.manager.switch(GameOverScreen(score, background, self.board.top()))
+        elif self.board.qualifies(score):
+            self.manager.switch(NameEntryScreen(score, background, self.board))
+        else:
+            self.manager.switch(GameOverScreen(score, background, self.board.top()))
+
+    def draw(self, screen):
+        with profiler.phase('draw'):
+            draw_game(self.state, self.timestep.alpha)
+        with profiler.phase('hud'):
+            draw_hud(self.state, self.board.highest_score())
+        if profiler.show_overlay:
+            blit_rect = profiler.draw_overlay(view.surface, get_font(view.length(18)), texts.render)
+            if dirty:
+                dirty.add(blit_rect)
+
+    def present(self):
+        with profiler.phase('present'):
+            present()
+        # Counted on the world: ArrayWorld builds its birds and stones lists on every read
+        world = self.state.world
+        profiler.end_frame(birds=world.bird_total(), stones=world.stone_total(),
+                           dropped=round(self.timestep.dropped_time, 2))
+
+def main():
+    global dirty, menu
+    logging.basicConfig(level=os.environ.get('PIGEONS_LOG', 'WARNING'))
+    init_display(float(os.environ.get('PIGEONS_RENDER_SCALE', 1.0)))
+    queue_assets()
+    if os.environ.get('PIGEONS_PROFILE'):
+        profiler.toggle()
+    if os.environ.get('PIGEONS_TRACE'):
+        profiler.open_trace(os.environ['PIGEONS_TRACE'])
+
+    replay_path = os.environ.get('PIGEONS_REPLAY')
+    board = open_leaderboard(os.environ.get('PIGEONS_LEADERBOARD', 'leaderboard.json'))
+
+    def new_game():
+        return GameplayScreen(
+            board,
+            backend=os.environ.get('PIGEONS_BACKEND', 'python'),
+            tick_rate=int(os.environ.get('PIGEONS_TICK_RATE', FPS)),
+            render_fps=int(os.environ.get('PIGEONS_RENDER_FPS', FPS)),
+            time_scale=float(os.environ.get('PIGEONS_TIME_SCALE', 1.0)),
+            record_path=os.environ.get('PIGEONS_RECORD'),
+            replay=Replay.load(replay_path) if replay_path else None,
+            bot=float(os.environ['PIGEONS_BOT']) if os.environ.get('PIGEONS_BOT') else None,
+        )
+
+    def start_game():
+        if not loader.done:
+            return LoadingScreen(loader, GAME_ASSETS, new_game)
+        return new_game()
+
+    def show_menu():
+        global menu, dirty
+        setup_menu_assets()
+        # Updated rects are in view pixels, which a view stretched in
+        # software does not share with the window
+        if os.environ.get('PIGEONS_DIRTY') and view.direct:
+            dirty = DirtyRects(view.surface, view_sky)
+        menu = Menu(SKY, WIDTH, HEIGHT, board, sounds['select'], start_game)
+        return menu
+
+    SceneManager(screen, clock).run(LoadingScreen(loader, MENU_ASSETS, show_menu))
+    profiler.close()
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Background asset loading.
+
+A worker thread reads each file and decodes it (pygame.image.load from the
+bytes, the sound bank's decode() for effects) in priority order. The main thread
+calls poll() between frames to finish the jobs that are ready: converting
+images to the display format and handing them to the sprite cache, which has
+to happen on the thread that owns the display. Every asset records how long
+its read, decode and finish steps took.
+"""
+import io
+import logging
+import os
+import queue
+import threading
+import time
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+IMAGE = 'image'
+SOUND = 'sound'
+MUSIC = 'music'
+FONT = 'font'
+
+
+class AssetJob:
+    def __init__(self, kind, name, path, priority, alpha=True):
+        self.kind = kind
+        self.name = name
+        self.path = path
+        self.priority = priority
+        self.alpha = alpha
+        self.result = None
+        self.error = None
+        self.size = 0
+        self.read_ms = 0.0
+        self.decode_ms = 0.0
+        self.finish_ms = 0.0
+        self.done = False
+
+
+class AssetLoader:
+    def __init__(self, sprites, sounds):
+        self.sprites = sprites
+        self.sounds = sounds
+        self.jobs = []
+        self._ready = queue.Queue()
+        self._thread = None
+        self.finished = 0
+        self.music = None  # the mixer streams from this buffer, so keep it alive
+
+    # Queueing
+
+    def add_image(self, name, path, priority=1, alpha=True):
+        bundle = self.sprites.bundle
+        if bundle is not None and bundle.has(name):
+            return  # the sprite cache maps it from the bundle, already scaled
+        self.jobs.append(AssetJob(IMAGE, name, path, priority, alpha))
+
+    def add_sound(self, name, path, priority=1):
+        self.jobs.append(AssetJob(SOUND, name, path, priority))
+
+    def add_music(self, path, priority=1):
+        self.jobs.append(AssetJob(MUSIC, path, path, priority))
+
+    def add_font(self, name, priority=0):
+        """Warm pygame's system font table, which is slow to build the first time."""
+        self.jobs.append(AssetJob(FONT, name, None, priority))
+
+    def start(self):
+        self.jobs.sort(key=lambda job: job.priority)
+        self._thread = threading.Thread(target=self._work, name='asset-loader', daemon=True)
+        self._thread.start()
+
+    # Worker thread
+
+    def _work(self):
+        for job in self.jobs:
+            try:
+                start = time.perf_counter()
+                data = None
+                if job.path:
+                    with open(job.path, 'rb') as f:
+                        data = f.read()
+                    job.size = len(data)
+                read = time.perf_counter()
+                if job.kind == IMAGE:
+                    job.result = pygame.image.load(io.BytesIO(data), os.path.basename(job.path))
+                elif job.kind == SOUND:
+                    job.result = self.sounds.decode(job.path, data)
+                elif job.kind == MUSIC:
+                    job.result = io.BytesIO(data)
+                elif job.kind == FONT:
+                    job.result = pygame.font.match_font(job.name)
+                job.read_ms = (read - start) * 1000
+                job.decode_ms = (time.perf_counter() - read) * 1000
+            except Exception as e:
+                job.error = e
+            self._ready.put(job)
+
+    # Main thread
+
+    def poll(self, budget_ms=8.0):
+        """Finish decoded jobs until budget_ms is spent. Returns True when all are done."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        while time.perf_counter() < deadline:
+            try:
+                job = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(job)
+        return self.done
+
+    def _finish(self, job):
+        start = time.perf_counter()
+        if job.error is not None:
+            log.error("could not load %s: %s", job.path or job.name, job.error)
+        elif job.kind == IMAGE:
+            self.sprites.add(job.name, job.result, job.alpha)
+        elif job.kind == SOUND:
+            self.sounds.add(job.name, job.result)
+        elif job.kind == MUSIC:
+            self.music = job.result
+            pygame.mixer.music.load(self.music, os.path.basename(job.path))
+            pygame.mixer.music.play(-1)
+        job.result = None
+        job.finish_ms = (time.perf_counter() - start) * 1000
+        job.done = True
+        self.finished += 1
+
+    def wait(self):
+        """Block until every asset is loaded (for tools that need no progress screen)."""
+        while not self.done:
+            self.poll(budget_ms=50)
+            time.sleep(0.001)
+
+    @property
+    def done(self):
+        return self.finished == len(self.jobs)
+
+    @property
+    def progress(self):
+        return self.finished / len(self.jobs) if self.jobs else 1.0
+
+    def ready(self, priority):
+        """True once every job at this priority or more urgent has finished."""
+        return all(job.done for job in self.jobs if job.priority <= priority)
+
+    def report(self):
+        """Per-asset timings as (name, bytes, read_ms, decode_ms, finish_ms)."""
+        return [(job.name, job.size, job.read_ms, job.decode_ms, job.finish_ms) for job in self.jobs]
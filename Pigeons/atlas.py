@@ -0,0 +1,69 @@
+"""Sprite atlas: every gameplay sprite frame packed into one surface.
+
+A manifest maps sequence names to frames, each an (asset, size) the sprite
+cache can produce:
+
+    {'bird': [('brib_f1.png', (50, 40)), ('brib_f2.png', (50, 40)), ...],
+     'stone': [('stone.png', (24, 24)), ('stone.png', (48, 48))]}
+
+pack() copies every distinct frame into a single SRCALPHA surface, tallest
+first along shelves, and remembers where each one went. The renderer then
+blits from the one sheet with a source rect, so a frame full of birds and
+stones is one Surface.blits() call over one block of pixels instead of a
+surface per sprite. Frames are copied exactly, alpha included, so drawing
+from the atlas gives the same pixels as drawing the sprites themselves.
+"""
+import pygame
+
+
+class Atlas:
+    def __init__(self, surface, regions, sequences):
+        self.surface = surface
+        self.regions = regions  # (asset, size) -> Rect on the sheet
+        self.sequences = sequences  # name -> list of Rects, in frame order
+
+    @classmethod
+    def pack(cls, sprites, manifest, max_width=512, padding=1):
+        """Build an atlas from the sprite cache's surfaces for every frame in the manifest."""
+        frames = {}
+        for entries in manifest.values():
+            for asset, size in entries:
+                key = (asset, tuple(size))
+                if key not in frames:
+                    frames[key] = sprites.get(asset, key[1])
+
+        # Shelf packing: tallest first, left to right, a new shelf when a row is full
+        regions = {}
+        x = y = shelf_height = width = 0
+        for key, surface in sorted(frames.items(), key=lambda item: -item[1].get_height()):
+            w, h = surface.get_size()
+            if x and x + w > max_width:
+                x, y, shelf_height = 0, y + shelf_height + padding, 0
+            regions[key] = pygame.Rect(x, y, w, h)
+            x += w + padding
+            shelf_height = max(shelf_height, h)
+            width = max(width, x - padding)
+
+        sheet = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+        sheet = sheet.convert_alpha()
+        sheet.fill((0, 0, 0, 0))
+        for key, rect in regions.items():
+            # MAX onto transparent black copies the pixels as they are; a normal blit would blend them
+            sheet.blit(frames[key], rect, special_flags=pygame.BLEND_RGBA_MAX)
+        sequences = {name: [regions[(asset, tuple(size))] for asset, size in entries]
+                     for name, entries in manifest.items()}
+        return cls(sheet, regions, sequences)
+
+    def frames(self, name):
+        return self.sequences[name]
+
+    def region(self, asset, size):
+        return self.regions[(asset, tuple(size))]
+
+    def subsurface(self, rect):
+        """The frame as a Surface sharing the sheet's pixels, for code that needs one."""
+        return self.surface.subsurface(rect)
+
+    def describe(self):
+        """The packed layout, as JSON-friendly {sequence: [[x, y, w, h], ...]}."""
+        return {name: [list(rect) for rect in rects] for name, rects in self.sequences.items()}
@@ -0,0 +1,512 @@
+"""Microbenchmarks for the physics, collision, tracer, rendering, HUD, sprite and leaderboard paths.
+
+Runs with SDL's dummy video and audio drivers, so no window is needed:
+
+    python bench.py --out bench.json                    # run and save results
+    python bench.py --baseline bench.json               # compare against them
+    python bench.py --baseline bench.json --threshold 0.2 --filter collision
+
+Each benchmark is timed `--repeat` times and the median is kept. When a
+baseline is given, any benchmark whose median got slower than the baseline by
+more than the threshold is reported and the exit status is 1.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import pygame
+
+import simulation
+import tracer
+from atlas import Atlas
+from bundle import AssetBundle, write_bundle
+from leaderboard import Leaderboard, SQLiteLeaderboard
+from renderscale import RenderScale
+from simulation import Bird, Stone, EntityWorld, check_collision, swept_contact
+from sprites import SpriteCache
+from textcache import TextCache, BoundText
+from tracerlayer import TracerLayer
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _birds(count, rng, make=Bird):
+    birds = []
+    for _ in range(count):
+        bird = make(rng)
+        bird.x = bird.prev_x = rng.uniform(0, simulation.WIDTH)
+        birds.append(bird)
+    return birds
+
+
+def _stones(count, rng, make=Stone):
+    stones = []
+    for _ in range(count):
+        stone = make(rng.randint(1, 90), rng.randint(10, 150))
+        stone.time = rng.uniform(0, 3)
+        # Twice, so prev_x/prev_y is one step back rather than the launch point
+        stone.update()
+        stone.update()
+        stones.append(stone)
+    return stones
+
+
+# Each factory sets up its data and returns the zero-argument callable to time
+
+@benchmark('stone_update_1000')
+def bench_stone_update():
+    stones = _stones(1000, random.Random(1))
+
+    def run():
+        for stone in stones:
+            stone.update()
+    return run
+
+
+@benchmark('bird_move_1000')
+def bench_bird_move():
+    birds = _birds(1000, random.Random(1))
+
+    def run():
+        for bird in birds:
+            bird.move()
+    return run
+
+
+@benchmark('entity_spawn_cull_1000')
+def bench_entity_churn():
+    rng = random.Random(1)
+
+    def run():
+        # Birds spawn and fly off screen, so every one is recycled through the pool
+        world = EntityWorld()
+        for _ in range(1000):
+            world.spawn_bird(rng, 0.0)
+            world.spawn_stone(45, 50)
+        world.advance(700.0)
+        world.clear()
+    return run
+
+
+def _collision_bench(stone_count, bird_count, test=check_collision):
+    def factory():
+        rng = random.Random(stone_count * 1000 + bird_count)
+        stones = _stones(stone_count, rng)
+        birds = _birds(bird_count, rng)
+
+        def run():
+            for stone in stones:
+                for bird in birds:
+                    test(stone, bird)
+        return run
+    return factory
+
+
+def _world_bench(stone_count, bird_count, backend):
+    def factory():
+        seed = stone_count * 1000 + bird_count
+        # EntityWorld hands the entities it culls back to the pools, so take
+        # them from there too; ArrayWorld copies them into its arrays
+        if backend == 'python':
+            make_stone, make_bird = simulation.stone_pool.acquire, simulation.bird_pool.acquire
+        else:
+            make_stone, make_bird = Stone, Bird
+
+        worlds = []
+
+        def setup():
+            # A fresh world with fresh entities each time, so hits do not thin
+            # out later runs
+            cleanup()
+            rng = random.Random(seed)
+            world = simulation.make_world(backend)
+            for stone in _stones(stone_count, rng, make_stone):
+                world.add_stone(stone)
+            for bird in _birds(bird_count, rng, make_bird):
+                world.add_bird(bird)
+            worlds[:] = [world]
+
+        def cleanup():
+            if worlds:
+                worlds.pop().clear()
+
+        def run():
+            worlds[0].advance(0.0)
+        run.setup = setup
+        run.cleanup = cleanup
+        return run
+    return factory
+
+
+for _stones_n, _birds_n in ((10, 10), (50, 50), (200, 200)):
+    BENCHMARKS[f'check_collision_{_stones_n}x{_birds_n}'] = _collision_bench(_stones_n, _birds_n)
+    BENCHMARKS[f'swept_contact_{_stones_n}x{_birds_n}'] = _collision_bench(_stones_n, _birds_n, swept_contact)
+for _stones_n, _birds_n in ((10, 10), (50, 50), (200, 200), (500, 500)):
+    BENCHMARKS[f'world_advance_python_{_stones_n}x{_birds_n}'] = _world_bench(_stones_n, _birds_n, 'python')
+    BENCHMARKS[f'world_advance_numpy_{_stones_n}x{_birds_n}'] = _world_bench(_stones_n, _birds_n, 'numpy')
+
+
+@benchmark('tracer_full_range')
+def bench_tracer():
+    def run():
+        for angle in range(1, 91, 3):
+            for velocity in range(10, 151, 5):
+                tracer._sample(angle, velocity)
+    return run
+
+
+@benchmark('tracer_cached_lookup')
+def bench_tracer_cached():
+    tracer.tracer_dots(45, 50)
+
+    def run():
+        for _ in range(1000):
+            tracer.tracer_dots(45, 50)
+    return run
+
+
+def _tracer_aims():
+    # A player sweeping the angle: the aim changes every few frames
+    return [(45 + frame // 4 % 20, 80) for frame in range(60)]
+
+
+@benchmark('tracer_draw_alloc')
+def bench_tracer_draw_alloc():
+    target = pygame.Surface((simulation.WIDTH, simulation.HEIGHT))
+    aims = _tracer_aims()
+
+    def run():
+        # The old renderer: a fresh full-screen layer and dot surface every time
+        for angle, velocity in aims:
+            layer = pygame.Surface((simulation.WIDTH, simulation.HEIGHT), pygame.SRCALPHA)
+            for x, y, alpha in tracer.tracer_dots(angle, velocity):
+                dot = pygame.Surface((12, 12), pygame.SRCALPHA)
+                pygame.draw.circle(dot, (255, 255, 255, alpha), (6, 6), 6)
+                layer.blit(dot, (x - 6, y - 6))
+            bounds = tracer.tracer_bounds(angle, velocity)
+            target.blit(layer, bounds, bounds)
+    return run
+
+
+@benchmark('tracer_draw_layer')
+def bench_tracer_draw_layer():
+    target = pygame.Surface((simulation.WIDTH, simulation.HEIGHT))
+    layer = TracerLayer((simulation.WIDTH, simulation.HEIGHT))
+    aims = _tracer_aims()
+
+    def run():
+        for angle, velocity in aims:
+            layer.draw(target, angle, velocity)
+    return run
+
+
+def _render_frame(scale, dirty=False):
+    # A busy gameplay frame drawn at the given render scale; dirty restores only what the
+    # sprites covered, like DirtyRects. SDL stretches the view to the window as it presents,
+    # which the dummy driver cannot time, so presenting is left out at every scale
+    size = (simulation.WIDTH, simulation.HEIGHT)
+    view = RenderScale(pygame.Surface((round(size[0] * scale), round(size[1] * scale))), scale, size)
+    sky = pygame.Surface(view.size((simulation.WIDTH, simulation.HEIGHT + 60)))
+    sky.fill((40, 60, 160))
+    bird = pygame.Surface(view.size((50, 40)), pygame.SRCALPHA)
+    bird.fill((200, 200, 255, 255))
+    stone = pygame.Surface(view.size((24, 24)), pygame.SRCALPHA)
+    stone.fill((128, 128, 128, 255))
+    layer = TracerLayer(view.surface.get_size(), view.length(6), scale)
+    rng = random.Random(5)
+    birds = [view.point(rng.uniform(0, simulation.WIDTH), rng.uniform(0, 300)) for _ in range(20)]
+    stones = [view.point(rng.uniform(0, simulation.WIDTH), rng.uniform(0, simulation.HEIGHT)) for _ in range(20)]
+    view.surface.blit(sky, (0, 0))
+    previous = []
+
+    def run():
+        nonlocal previous
+        for _ in range(10):
+            if dirty:
+                for rect in previous:
+                    view.surface.blit(sky, rect, rect)
+            else:
+                view.surface.blit(sky, (0, 0))
+            rects = view.surface.blits([(bird, pos) for pos in birds])
+            rects += view.surface.blits([(stone, pos) for pos in stones])
+            rects.append(layer.draw(view.surface, 45, 80))
+            previous = rects
+    return run
+
+
+@benchmark('render_frame_full')
+def bench_render_frame_full():
+    return _render_frame(1.0)
+
+
+@benchmark('render_frame_half')
+def bench_render_frame_half():
+    return _render_frame(0.5)
+
+
+@benchmark('render_frame_half_dirty')
+def bench_render_frame_half_dirty():
+    return _render_frame(0.5, dirty=True)
+
+
+def _hud_font():
+    pygame.font.init()
+    return pygame.font.SysFont('VCR OSD Mono', 36)
+
+
+@benchmark('hud_render_uncached')
+def bench_hud_uncached():
+    font = _hud_font()
+
+    def run():
+        for score in range(0, 2000, 100):
+            angle_text = "Angle: 45°  Velocity: 50  Score: "
+            high_score_text = f"Stones: 20  High Score: {score}"
+            font.render(angle_text, True, (0, 0, 0))
+            font.render(high_score_text, True, (0, 0, 0))
+            font.render(angle_text, True, (255, 255, 255))
+            font.render(f"{score}", True, (0, 255, 0))
+            font.render(high_score_text, True, (255, 255, 0))
+    return run
+
+
+@benchmark('hud_render_cached')
+def bench_hud_cached():
+    font = _hud_font()
+    cache = TextCache()
+    angle = BoundText(cache, font, "Angle: {}°  Velocity: {}  Score: ", (255, 255, 255))
+    score_line = BoundText(cache, font, "{}", (0, 255, 0))
+    high_score = BoundText(cache, font, "Stones: {}  High Score: {}", (255, 255, 0))
+
+    def run():
+        # Twenty frames of a score that changes every fifth frame
+        for frame in range(20):
+            angle.update(45, 50)
+            score_line.update(frame // 5 * 100)
+            high_score.update(20, 16000)
+    return run
+
+
+def _leaderboard_bench(entries, write):
+    def factory():
+        directory = tempfile.mkdtemp(prefix='pigeons-bench-')
+        path = os.path.join(directory, 'leaderboard.json')
+        rng = random.Random(entries)
+        board = [{'name': f'P{i}', 'score': rng.randint(0, 20000), 'date': '2025-05-19 17:15'}
+                 for i in range(entries)]
+        board.sort(key=lambda x: x['score'], reverse=True)
+        with open(path, 'w') as f:
+            json.dump(board, f)
+
+        def run():
+            leaderboard = Leaderboard(path, size=entries)
+            if write:
+                leaderboard.add('Bench', 10000)
+            else:
+                leaderboard.entries()
+        run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return run
+    return factory
+
+
+def _sqlite_leaderboard_bench(entries, write):
+    def factory():
+        directory = tempfile.mkdtemp(prefix='pigeons-bench-')
+        board = SQLiteLeaderboard(os.path.join(directory, 'leaderboard.db'), import_path=None)
+        rng = random.Random(entries)
+        board.import_entries([{'name': f'P{i}', 'score': rng.randint(0, 20000), 'date': '2025-05-19 17:15'}
+                              for i in range(entries)])
+
+        def run():
+            if write:
+                board.add('Bench', 10000)
+            else:
+                # What the game over screen asks: does it qualify, then the top five
+                board.qualifies(10000)
+                board._entries = None
+                board.entries()
+
+        def cleanup():
+            board.close()
+            shutil.rmtree(directory, ignore_errors=True)
+        run.cleanup = cleanup
+        return run
+    return factory
+
+
+for _entries in (5, 1000, 10000):
+    BENCHMARKS[f'leaderboard_load_{_entries}'] = _leaderboard_bench(_entries, write=False)
+    BENCHMARKS[f'leaderboard_add_{_entries}'] = _leaderboard_bench(_entries, write=True)
+for _entries in (1000, 100000):
+    BENCHMARKS[f'leaderboard_sqlite_top_{_entries}'] = _sqlite_leaderboard_bench(_entries, write=False)
+    BENCHMARKS[f'leaderboard_sqlite_add_{_entries}'] = _sqlite_leaderboard_bench(_entries, write=True)
+
+
+# Every sprite the game draws, at the sizes it draws them
+_SPRITES = ([('nightcity.png', None, False), ('brib_f1.png', (150, 150), True)]
+            + [(f'brib_f{i}.png', (50, 40), True) for i in range(1, 9)]
+            + [(f'zombieboy{i}.png', (100, 100), True) for i in range(1, 6)]
+            + [(info['image'], (80, 80), True) for info in simulation.POWERUP_TYPES.values()]
+            + [('stone.png', (24, 24), True), ('stone.png', (48, 48), True)])
+
+
+def _sprite_load_bench(bundled):
+    def factory():
+        pygame.display.set_mode((1, 1))  # convert() needs a video mode, even a dummy one
+        directory = tempfile.mkdtemp(prefix='pigeons-bench-')
+        path = os.path.join(directory, 'sprites.bundle')
+        write_bundle(path, SpriteCache('assets'), _SPRITES)
+
+        def run():
+            # A fresh cache fetching every sprite once, as at startup
+            sprites = SpriteCache('assets', bundle=AssetBundle.open(path) if bundled else None)
+            for name, size, alpha in _SPRITES:
+                sprites.get(name, size, alpha)
+        run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return run
+    return factory
+
+
+BENCHMARKS['sprites_load_png'] = _sprite_load_bench(bundled=False)
+BENCHMARKS['sprites_load_bundle'] = _sprite_load_bench(bundled=True)
+
+
+def _sprite_blit_bench(use_atlas):
+    def factory():
+        pygame.display.set_mode((1, 1))
+        sprites = SpriteCache('assets')
+        manifest = {'bird': [(f'brib_f{i}.png', (50, 40)) for i in range(1, 9)],
+                    'stone': [('stone.png', (24, 24))]}
+        atlas = Atlas.pack(sprites, manifest)
+        target = pygame.Surface((simulation.WIDTH, simulation.HEIGHT))
+        rng = random.Random(3)
+        positions = [(rng.randrange(simulation.WIDTH), rng.randrange(simulation.HEIGHT)) for _ in range(100)]
+        frames = [frame for sequence in manifest for frame in atlas.frames(sequence)]
+        images = [sprites.get(asset, size) for sequence in manifest.values() for asset, size in sequence]
+
+        def run():
+            # Ten frames of 100 birds and stones
+            for _ in range(10):
+                if use_atlas:
+                    target.blits([(atlas.surface, pos, frames[i % len(frames)]) for i, pos in enumerate(positions)],
+                                 doreturn=False)
+                else:
+                    for i, pos in enumerate(positions):
+                        target.blit(images[i % len(images)], pos)
+        return run
+    return factory
+
+
+BENCHMARKS['sprite_blits_separate'] = _sprite_blit_bench(use_atlas=False)
+BENCHMARKS['sprite_blits_atlas'] = _sprite_blit_bench(use_atlas=True)
+
+
+def time_benchmark(factory, repeat):
+    run = factory()
+    setup = getattr(run, 'setup', None)  # untimed, before every run
+    try:
+        if setup:
+            setup()
+        run()  # warm-up
+        samples = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+    finally:
+        cleanup = getattr(run, 'cleanup', None)
+        if cleanup:
+            cleanup()
+    return {
+        'median_s': statistics.median(samples),
+        'min_s': min(samples),
+        'max_s': max(samples),
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(names, repeat):
+    results = {}
+    for name in names:
+        try:
+            results[name] = time_benchmark(BENCHMARKS[name], repeat)
+        except ImportError as e:
+            # The numpy backend is optional
+            print(f"{name:40s} skipped ({e})")
+            continue
+        print(f"{name:40s} {results[name]['median_s'] * 1000:10.3f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline_s, current_s) for every benchmark that regressed."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['median_s'] > before['median_s'] * (1 + threshold):
+            regressions.append((name, before['median_s'], result['median_s']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pigeons! microbenchmarks")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against results from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed slowdown before a benchmark counts as a regression (default 0.10)")
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(names, args.repeat)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+                  f"(+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold * 100:.0f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
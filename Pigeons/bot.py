@@ -0,0 +1,252 @@
+"""Aim-solving bot that plays the game through the normal input path.
+
+AimBot is an input source like read_inputs: call it once per tick and it
+returns the Inputs to step with. It picks a bird, solves for the angle and
+velocity that put a stone through the bird's collision center, walks the aim
+there with the arrow keys and throws. For every whole angle from 1 to 90
+the intercept velocity has a closed form, so each plan solves all 90 angles
+at once, as one NumPy expression when NumPy is installed and a plain loop
+otherwise.
+
+Run sessions headless at full speed for soak tests:
+
+    python bot.py --sessions 100 --accuracy 0.8
+    python bot.py --hours 4 --backend numpy
+
+or set PIGEONS_BOT=1 (or an accuracy such as 0.8) to watch it play. At 0.8
+a session runs out of stones within a few simulated minutes; from about 0.9
+up the bot hits nearly every bird, so sessions are cut off after
+SESSION_SECONDS and scored as they stand.
+"""
+import math
+import random
+import time
+
+from simulation import (
+    FPS, GRAVITY, boy_pos, STONE_TIME_STEP, THROW_COOLDOWN, DEFAULT_CONFIG, Inputs, GameState,
+    collision_circle, HIT, POWERUP, THROW,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LAUNCH_X = boy_pos[0] + 90
+LAUNCH_Y = boy_pos[1] + 7
+ANGLES = range(1, 91)
+MIN_VELOCITY, MAX_VELOCITY = 10, 150
+# Flat enough that even the fastest throw stays well below the lowest bird
+MISS_ANGLE = 5
+SESSION_SECONDS = 30 * 60  # simulated; sessions at accuracy 1.0 never end
+
+
+def _solve_python(distance, rise, bird_speed, gravity):
+    """Return (angle, velocity, flight_time) for every angle with a reachable intercept."""
+    a = 0.5 * gravity
+    solutions = []
+    for angle in ANGLES:
+        rad = math.radians(angle)
+        tan = math.tan(rad)
+        b = bird_speed * tan
+        c = rise - distance * tan
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            continue
+        t = (-b + math.sqrt(disc)) / (2 * a)
+        if t <= 0:
+            continue
+        velocity = (distance - bird_speed * t) / (math.cos(rad) * t)
+        if MIN_VELOCITY <= velocity <= MAX_VELOCITY:
+            solutions.append((angle, velocity, t))
+    return solutions
+
+
+def _solve_numpy(distance, rise, bird_speed, gravity):
+    a = 0.5 * gravity
+    angles = np.arange(1, 91)
+    rad = np.radians(angles)
+    tan = np.tan(rad)
+    b = bird_speed * tan
+    c = rise - distance * tan
+    disc = b * b - 4 * a * c
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (-b + np.sqrt(disc)) / (2 * a)
+        velocity = (distance - bird_speed * t) / (np.cos(rad) * t)
+    ok = (disc >= 0) & (t > 0) & (velocity >= MIN_VELOCITY) & (velocity <= MAX_VELOCITY)
+    return list(zip(angles[ok].tolist(), velocity[ok].tolist(), t[ok].tolist()))
+
+
+def solve_intercepts(distance, rise, bird_speed, gravity=GRAVITY):
+    """Solve every angle for a throw that meets a target moving toward the boy.
+
+    distance is how far right of the launch point the target is and rise how
+    far above it, both at the moment of the throw. bird_speed is in pixels
+    per unit of stone flight time. Times are stone flight time too.
+
+    In flight time t the stone covers v*cos(a)*t while the target closes
+    bird_speed*t, which fixes v*t; putting that into the height equation
+    leaves g/2*t^2 + bird_speed*tan(a)*t + rise - distance*tan(a) = 0.
+    """
+    if np is not None:
+        return _solve_numpy(distance, rise, bird_speed, gravity)
+    return _solve_python(distance, rise, bird_speed, gravity)
+
+
+class AimBot:
+    """Input source that aims at birds and throws.
+
+    accuracy is the chance a throw is aimed true. The others are thrown flat,
+    under every bird, so each one costs a stone and below 1.0 sessions
+    run out; a throw only a few units off still hits too often for that,
+    since every hit gives its stone back.
+    """
+
+    def __init__(self, state, tick_rate=FPS, accuracy=1.0, seed=None):
+        self.state = state
+        self.frames = FPS / tick_rate
+        self.accuracy = accuracy
+        self.rng = random.Random(seed)
+        self.target = None  # (angle, velocity)
+        self.claimed = {}  # spawn_time -> sim time the stone should arrive by
+        self.plans = 0
+
+    def __call__(self):
+        state = self.state
+        if self.target is None:
+            self.target = self.plan()
+        if self.target is None:
+            return Inputs()
+
+        # How far the aim moves if a key is held this tick
+        steps = max(int(state.aim_timer + self.frames), 1)
+        angle, velocity = self.target
+        up = angle - state.angle >= steps
+        down = state.angle - angle >= steps
+        right = velocity - state.velocity >= steps
+        left = state.velocity - velocity >= steps
+        space = False
+        if not (up or down or left or right):
+            newest = state.world.newest_stone_time()
+            space = newest is None or newest > THROW_COOLDOWN
+            if space:
+                self.target = None
+        return Inputs(up=up, down=down, left=left, right=right, space=space)
+
+    def plan(self):
+        """Pick a bird and return the aim that hits it, or None if none can be hit."""
+        state = self.state
+        self.plans += 1
+        self.claimed = {key: until for key, until in self.claimed.items() if until > state.time}
+        # Pixels a bird moves per 60 Hz frame, and per unit of stone flight time
+        frame_speed = state.game_speed
+        best = None
+        for bird in state.birds:
+            if bird.spawn_time in self.claimed:
+                continue
+            speed = bird.speed * frame_speed
+            bird_x, bird_y, _ = collision_circle(bird)
+            # The bird keeps flying while the aim moves, one unit per frame,
+            # so solve, add that delay and solve again
+            delay = 0
+            choice = None
+            for _ in range(3):
+                # The stone is drawn one step behind its flight time, and the bird
+                # has moved once more by the end of the throw step
+                distance = bird_x - speed * (delay + self.frames) - LAUNCH_X
+                if distance <= 0:
+                    break
+                solutions = solve_intercepts(distance, LAUNCH_Y - bird_y, speed / STONE_TIME_STEP,
+                                             state.config.gravity)
+                if not solutions:
+                    choice = None
+                    break
+                choice = min(solutions, key=lambda s: max(abs(s[0] - state.angle),
+                                                          abs(round(s[1]) - state.velocity)))
+                delay = max(abs(choice[0] - state.angle), abs(round(choice[1]) - state.velocity))
+            if choice is None:
+                continue
+            # Power-up birds first, then whichever needs the least aiming
+            score = (bird.powerup_type is None, delay)
+            if best is None or score < best[0]:
+                arrival = state.time + (delay + choice[2] / STONE_TIME_STEP) / FPS
+                best = (score, choice, bird.spawn_time, arrival)
+        if best is None:
+            return None
+        _, (angle, velocity, _), key, arrival = best
+        if self.rng.random() >= self.accuracy:
+            return MISS_ANGLE, state.velocity
+        self.claimed[key] = arrival
+        return angle, min(max(round(velocity), MIN_VELOCITY), MAX_VELOCITY)
+
+
+def play_session(seed, accuracy=1.0, backend='python', tick_rate=FPS, max_ticks=None,
+                 config=DEFAULT_CONFIG, player=None):
+    """Play one headless session and return its statistics.
+
+    player(state, tick_rate, seed) makes the input source; the default is an
+    AimBot with the given accuracy.
+    """
+    state = GameState(seed=seed, backend=backend, config=config)
+    if player is None:
+        bot = AimBot(state, tick_rate, accuracy, seed)
+    else:
+        bot = player(state, tick_rate, seed)
+    dt = 1.0 / tick_rate
+    throws = hits = powerups = ticks = 0
+    start = time.perf_counter()
+    while not state.game_over and (max_ticks is None or ticks < max_ticks):
+        for event in state.step(bot(), dt):
+            if event == THROW:
+                throws += 1
+            elif event == HIT:
+                hits += 1
+            elif event == POWERUP:
+                powerups += 1
+        ticks += 1
+    return {
+        'seed': seed,
+        'score': state.score,
+        'throws': throws,
+        'hits': hits,
+        'powerups': powerups,
+        'ticks': ticks,
+        'sim_seconds': state.time,
+        'finished': state.game_over,
+        'wall_seconds': time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Let the aim bot play Pigeons! headless.")
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--hours', type=float, help="keep starting sessions until this much wall time passed")
+    parser.add_argument('--accuracy', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first session, then counting up")
+    parser.add_argument('--backend', default='python', choices=['python', 'numpy'])
+    parser.add_argument('--tick-rate', type=int, default=FPS)
+    parser.add_argument('--max-ticks', type=int,
+                        help=f"end a session after this many ticks (default: {SESSION_SECONDS} simulated "
+                             f"seconds at the tick rate)")
+    args = parser.parse_args(argv)
+    if args.max_ticks is None:
+        args.max_ticks = round(SESSION_SECONDS * args.tick_rate)
+
+    deadline = time.perf_counter() + args.hours * 3600 if args.hours else None
+    seed = args.seed
+    played = 0
+    while (played < args.sessions) if deadline is None else (time.perf_counter() < deadline):
+        stats = play_session(seed, args.accuracy, args.backend, args.tick_rate, args.max_ticks)
+        print(f"seed {seed}: score {stats['score']}, {stats['hits']}/{stats['throws']} hits, "
+              f"{stats['powerups']} power-ups, {stats['ticks']} ticks in {stats['wall_seconds']:.2f}s"
+              + ("" if stats['finished'] else " (cut off)"))
+        seed += 1
+        played += 1
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Uniform-grid spatial hash used to find which birds a stone could hit.
+
+The grid is rebuilt every step from the bird centers. With the cell size set
+to the largest collision radius, every bird a stone can touch sits in the 3x3
+block of cells around the stone, so only those birds go to the exact test.
+A stone that moved during the step queries the block around the box it swept.
+"""
+import math
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.min_y = math.inf
+        self.max_y = -math.inf
+        self.count = 0
+
+    def clear(self):
+        self.cells.clear()
+        self.min_y = math.inf
+        self.max_y = -math.inf
+        self.count = 0
+
+    def insert(self, item, x, y):
+        size = self.cell_size
+        key = (int(x // size), int(y // size))
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [item]
+        else:
+            bucket.append(item)
+        if y < self.min_y:
+            self.min_y = y
+        if y > self.max_y:
+            self.max_y = y
+        self.count += 1
+
+    def query(self, x, y):
+        """Return every item whose point lies within one cell of (x, y)."""
+        return self.query_rect(x, y, x, y)
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Return every item whose point lies within one cell of the box."""
+        size = self.cell_size
+        # Birds only fly in a narrow band, so most stones miss it entirely
+        if y1 < self.min_y - size or y0 > self.max_y + size:
+            return []
+        found = []
+        cells = self.cells
+        for ix in range(int(x0 // size) - 1, int(x1 // size) + 2):
+            for iy in range(int(y0 // size) - 1, int(y1 // size) + 2):
+                bucket = cells.get((ix, iy))
+                if bucket:
+                    found.extend(bucket)
+        return found
@@ -0,0 +1,175 @@
+"""Pre-scaled sprites in one memory-mapped file.
+
+    python bundle.py                  # writes assets/sprites.bundle
+    python bundle.py --scale 0.5      # for PIGEONS_RENDER_SCALE=0.5
+
+The build decodes every sprite the game draws, scales it to the size it is
+drawn at and writes the raw BGRA pixels one after another behind a JSON
+index. It also records where the system font lives, so the game can open
+it directly instead of scanning the system font list.
+
+At startup the game maps the file and SpriteCache asks it first:
+pygame.image.frombuffer wraps the mapped pixels in a Surface with no
+decoding and no copy, in the same layout convert_alpha() produces. Opaque
+sprites (the sky) are converted once to the display format, since a
+surface with an alpha channel blits it half as fast.
+
+Every entry remembers the size and mtime of the PNG it came from. Entries
+whose PNG changed since the build are skipped and those sprites load from
+the PNG as before, as does everything when the bundle is missing, from
+another version or built for another render scale.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'PIGEONSB'
+VERSION = 1
+HEADER = struct.Struct('<8sII')  # magic, version, index length
+ALIGN = 64
+FORMAT = 'BGRA'  # byte order of convert_alpha()'s ARGB8888 pixels
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_bundle(path, sprites, wanted, scale=1.0, fonts=None):
+    """Write every (name, size, alpha) in wanted, as sprites.get() returns it, to path."""
+    entries = []
+    blobs = []
+    offset = 0
+    for name, size, alpha in dict.fromkeys(wanted):
+        surface = sprites.get(name, size, alpha)
+        source_bytes, mtime_ns = _source_stamp(os.path.join(sprites.root, name))
+        data = pygame.image.tobytes(surface, FORMAT)
+        entries.append({
+            'name': name, 'size': list(size) if size else None, 'alpha': alpha,
+            'width': surface.get_width(), 'height': surface.get_height(),
+            'offset': offset, 'source_bytes': source_bytes, 'source_mtime_ns': mtime_ns,
+        })
+        padding = -len(data) % ALIGN
+        blobs.append(data + b'\0' * padding)
+        offset += len(data) + padding
+    index = json.dumps({'scale': scale, 'fonts': fonts or {}, 'sprites': entries}).encode()
+    start = HEADER.size + len(index)
+    start += -start % ALIGN
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        f.write(index)
+        f.write(b'\0' * (start - HEADER.size - len(index)))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return len(entries), start + offset
+
+
+class AssetBundle:
+    def __init__(self, mapping, index, start, root='assets'):
+        self.root = root
+        self.scale = index['scale']
+        self.fonts = index['fonts']
+        self._mapping = mapping  # the surfaces point into it, so it stays open
+        self._pixels = memoryview(mapping)[start:]
+        self._entries = {}
+        self.stale = set()
+        stamps = {}
+        for entry in index['sprites']:
+            name = entry['name']
+            if name not in stamps:
+                try:
+                    stamps[name] = _source_stamp(os.path.join(root, name))
+                except OSError:
+                    stamps[name] = None
+            if stamps[name] != (entry['source_bytes'], entry['source_mtime_ns']):
+                self.stale.add(name)
+                continue
+            size = tuple(entry['size']) if entry['size'] else None
+            self._entries[(name, size, entry['alpha'])] = entry
+        self.names = {name for name, _, _ in self._entries}
+        if self.stale:
+            log.info("bundle entries out of date, loading from PNG: %s", ', '.join(sorted(self.stale)))
+
+    @classmethod
+    def open(cls, path, scale=1.0, root='assets'):
+        """Map the bundle, or return None when there is none that fits."""
+        try:
+            with open(path, 'rb') as f:
+                # ACCESS_COPY: nothing draws onto sprites, but a stray write must not reach the file
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError) as e:
+            log.info("no sprite bundle at %s (%s), loading PNGs", path, e)
+            return None
+        try:
+            magic, version, index_length = HEADER.unpack_from(mapping)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"not a version {VERSION} bundle")
+            index = json.loads(mapping[HEADER.size:HEADER.size + index_length])
+            start = HEADER.size + index_length
+            start += -start % ALIGN
+            end = max((entry['offset'] + entry['width'] * entry['height'] * 4 for entry in index['sprites']),
+                      default=0)
+            if len(mapping) < start + end:
+                raise ValueError("truncated")
+        except (struct.error, ValueError) as e:
+            log.warning("ignoring sprite bundle %s: %s", path, e)
+            mapping.close()
+            return None
+        if index['scale'] != scale:
+            log.info("sprite bundle %s is for render scale %s, not %s; loading PNGs", path, index['scale'], scale)
+            mapping.close()
+            return None
+        return cls(mapping, index, start, root)
+
+    def has(self, name):
+        """True if the bundle has up-to-date pixels for this asset."""
+        return name in self.names
+
+    def font_path(self, name):
+        path = self.fonts.get(name)
+        return path if path and os.path.exists(path) else None
+
+    def surface(self, name, size=None, alpha=True):
+        """A Surface over the mapped pixels, or None if the bundle lacks this one."""
+        entry = self._entries.get((name, size, alpha))
+        if entry is None:
+            return None
+        width, height = entry['width'], entry['height']
+        pixels = self._pixels[entry['offset']:entry['offset'] + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), FORMAT)
+        return surface if alpha else surface.convert()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack the Pigeons! sprites into one pre-scaled bundle.")
+    parser.add_argument('--scale', type=float, default=1.0, help="render scale to build for")
+    parser.add_argument('--out', help="bundle path (default: the game's)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import PhysicsOriginal as game
+    from sprites import SpriteCache
+
+    game.init_display(args.scale)
+    sprites = SpriteCache('assets')
+    fonts = {game.FONT_NAME: pygame.font.match_font(game.FONT_NAME)}
+    out = args.out or game.BUNDLE_PATH
+    count, size = write_bundle(out, sprites, game.bundled_sprites(sprites), args.scale, fonts)
+    print(f"{count} sprites, {size / 1024:.0f} KiB written to {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
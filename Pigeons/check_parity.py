@@ -0,0 +1,153 @@
+"""Seeded consistency checks for the simulation backends and recordings.
+
+    python check_parity.py                  # 3 seeds, 2000 ticks each
+    python check_parity.py --seeds 10 --ticks 5000
+
+Three things must hold for recordings and sweeps to be trusted:
+
+- EntityWorld and soa.ArrayWorld are interchangeable. Both backends play
+  the same seeded sessions side by side, fed the same keys, at the default
+  tick rate and at a low one where swept collision does the work, with
+  extra birds spawned every few ticks so collisions resolve in crowds.
+  Events, score and entity counts must match on every tick, and positions
+  at the end.
+- A recording replays to the game it was recorded from. Each session is
+  recorded with InputRecorder, written out, loaded with Replay and played
+  back headless, and must end at the same time with the same score.
+- The tick rate changes nothing but how finely time is sliced. With no
+  input, birds must spawn at 20, 30 and 120 Hz within a 60 Hz frame of
+  when they spawn at 60 Hz, all session long.
+
+The sessions are played by bot.AimBot from the session's seed, so a
+failure can be rerun exactly. Every check runs on every seed and prints a
+line, which names the first difference if there is one; the exit status
+is 1 if any of them failed.
+"""
+import os
+import sys
+import tempfile
+
+from bot import AimBot
+from simulation import FPS, GameState, Bird
+from replay import InputRecorder, Replay, run_headless
+
+LOW_TICK_RATE = 20
+ACCURACY = 0.7  # misses too, so stones fly on past birds and sessions end
+CROWD_EVERY = 5  # ticks between the extra birds the backend check spawns
+
+
+def snapshot(state):
+    return (sorted((round(bird.x, 6), bird.y) for bird in state.birds),
+            sorted((round(stone.x, 6), round(stone.y, 6)) for stone in state.stones))
+
+
+def check_backends(seed, ticks, tick_rate=FPS):
+    """Play one session on both backends; return None, or where they first differ."""
+    states = [GameState(seed=seed, backend=backend) for backend in ('python', 'numpy')]
+    # One bot presses the keys for both: it breaks ties between equally good
+    # birds by the order it sees them in, which is not the same across backends
+    bot = AimBot(states[0], tick_rate, ACCURACY, seed)
+    for state in states:
+        state.stone_count = ticks  # never run dry, so the session lasts
+    dt = 1.0 / tick_rate
+    for tick in range(ticks):
+        inputs = bot()
+        rows = []
+        for state in states:
+            events = state.step(inputs, dt)
+            if tick % CROWD_EVERY == 0:
+                # Crowd the sky; both spawn from their own, identical RNG
+                state.world.add_bird(Bird(state.rng, state.time))
+            rows.append((tuple(events), state.score, state.stone_count, len(state.stones), len(state.birds)))
+        if rows[0] != rows[1]:
+            return f"tick {tick}: python {rows[0]} numpy {rows[1]}"
+    if snapshot(states[0]) != snapshot(states[1]):
+        return f"tick {ticks}: entity positions differ"
+    return None
+
+
+def spawn_times(seed, seconds, tick_rate):
+    """Simulated times at which birds spawned in a session with no input."""
+    state = GameState(seed=seed)
+    dt = 1.0 / tick_rate
+    times = []
+    for _ in range(round(seconds * tick_rate)):
+        timer = state.bird_spawn_timer
+        state.step(dt=dt)
+        if state.bird_spawn_timer < timer:
+            times.append(state.time)
+    return times
+
+
+def check_spawns(seed, ticks, tick_rate=FPS):
+    """Birds must spawn within a 60 Hz frame of when they do at 60 Hz; return None, or the first that did not."""
+    seconds = ticks / FPS
+    expected = spawn_times(seed, seconds, FPS)
+    actual = spawn_times(seed, seconds, tick_rate)
+    slack = max(1.0 / FPS, 1.0 / tick_rate) + 1e-9  # a spawn waits for the tick after its moment
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        if abs(got - want) > slack:
+            return f"bird {index} spawned at {got:.4f}s, at 60 Hz {want:.4f}s"
+    if abs(len(expected) - len(actual)) > 1:
+        return f"{len(actual)} birds spawned, at 60 Hz {len(expected)}"
+    return None
+
+
+def check_replay(seed, ticks, tick_rate=FPS):
+    """Record a session, replay the file headless; return None, or how they differ."""
+    state = GameState(high_score=1000, seed=seed)
+    fd, path = tempfile.mkstemp(suffix='.pgr')
+    os.close(fd)
+    try:
+        recorder = InputRecorder(path, seed, tick_rate, state.high_score)
+        bot = AimBot(state, tick_rate, ACCURACY, seed)
+        dt = 1.0 / tick_rate
+        for _ in range(ticks):
+            inputs = bot()
+            recorder.record(inputs)
+            state.step(inputs, dt)
+            if state.game_over:
+                break
+        recorder.save(state.score)
+        replay = Replay.load(path)
+    finally:
+        os.remove(path)
+    replayed, _ = run_headless(replay)
+    if (replay.ticks, replay.final_score) != (recorder.ticks, state.score):
+        return f"file holds {replay.ticks} ticks, score {replay.final_score}"
+    ending = (state.time, state.score, state.game_over)
+    replayed_ending = (replayed.time, replayed.score, replayed.game_over)
+    if replayed_ending != ending:
+        return "recorded (time, score, game over) %s, replayed %s" % (ending, replayed_ending)
+    return None
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check backend parity and record/replay round trips.")
+    parser.add_argument('--seeds', type=int, default=3, help="sessions per check")
+    parser.add_argument('--ticks', type=int, default=2000, help="ticks per session")
+    args = parser.parse_args(argv)
+
+    checks = [(f'replay {tick_rate} Hz', check_replay, tick_rate) for tick_rate in (FPS, LOW_TICK_RATE)]
+    checks += [(f'spawns {tick_rate} Hz', check_spawns, tick_rate) for tick_rate in (LOW_TICK_RATE, 30, 120)]
+    try:
+        import soa  # noqa: F401  the numpy backend is optional
+    except ImportError as e:
+        print(f"backend parity skipped ({e})")
+    else:
+        checks += [(f'backends {FPS} Hz', check_backends, FPS),
+                   (f'backends {LOW_TICK_RATE} Hz', check_backends, LOW_TICK_RATE)]
+
+    failures = 0
+    for name, check, tick_rate in checks:
+        for seed in range(args.seeds):
+            problem = check(seed, args.ticks, tick_rate)
+            print(f"{name:20s} seed {seed:<4d} {problem or 'ok'}")
+            failures += problem is not None
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
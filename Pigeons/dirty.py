@@ -0,0 +1,52 @@
+"""Dirty-rectangle presentation for the gameplay screen.
+
+Every blit made during a frame is recorded. At the start of the next frame
+only those rectangles are painted back from the background, and present()
+pushes the old and new rectangles to the display with
+pygame.display.update(rects) instead of flipping the whole window. When the
+dirty area gets too large to be worth it, it falls back to a full flip.
+"""
+import pygame
+
+
+class DirtyRects:
+    def __init__(self, surface, background, full_threshold=0.4):
+        self.surface = surface
+        self.background = background
+        self.full_threshold = full_threshold
+        self.screen_area = surface.get_width() * surface.get_height()
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.full_flips = 0
+        self.partial_updates = 0
+
+    def invalidate(self):
+        """Repaint and flip the whole screen on the next frame."""
+        self.full = True
+
+    def restore(self):
+        """Erase last frame's drawing by copying the background back over it."""
+        if self.full:
+            self.surface.blit(self.background, (0, 0))
+            return
+        for rect in self.previous:
+            self.surface.blit(self.background, rect, rect)
+
+    def add(self, rect):
+        if rect.width and rect.height:
+            self.current.append(rect)
+        return rect
+
+    def present(self):
+        rects = self.previous + self.current
+        dirty_area = sum(rect.width * rect.height for rect in rects)
+        if self.full or dirty_area > self.full_threshold * self.screen_area:
+            pygame.display.flip()
+            self.full_flips += 1
+        else:
+            pygame.display.update(rects)
+            self.partial_updates += 1
+        self.previous = self.current
+        self.current = []
+        self.full = False
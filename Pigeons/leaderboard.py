@@ -0,0 +1,280 @@
+"""Leaderboard storage kept in memory between reads.
+
+The JSON file is parsed once and served from memory after that. It is read
+again only when its mtime changes (checked at most once per check_interval
+seconds) or after add() writes it. Writes go to a temp file that is renamed
+over the original, so a crash never leaves half a leaderboard behind.
+
+SQLiteLeaderboard is the optional database backend for cabinets that want
+every score kept; open_leaderboard() picks one by file extension.
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+class Leaderboard:
+    def __init__(self, path='leaderboard.json', size=5, check_interval=1.0):
+        self.path = path
+        self.size = size
+        self.check_interval = check_interval
+        self._entries = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        self._mtime = self._file_mtime()
+        self._checked_at = time.monotonic()
+        if self._mtime is None:
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("could not read %s: %s", self.path, e)
+            return []
+        entries.sort(key=lambda x: x['score'], reverse=True)
+        return entries[:self.size]
+
+    def entries(self):
+        """Return the stored entries, best first."""
+        if self._entries is None:
+            self._entries = self._load()
+        elif time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._file_mtime() != self._mtime:
+                self._entries = self._load()
+        return self._entries
+
+    def top(self, n=None):
+        return self.entries()[:n]
+
+    def highest_score(self):
+        entries = self.entries()
+        if entries:
+            return entries[0]['score']  # Leaderboard is already sorted by score
+        return 0
+
+    def qualifies(self, score):
+        """Would this score make it onto the board?"""
+        entries = self.entries()
+        return score > 0 and (len(entries) < self.size or score > entries[-1]['score'])
+
+    def add(self, name, score):
+        leaderboard = list(self.entries())
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+        leaderboard.append({
+            'name': name,
+            'score': score,
+            'date': current_time
+        })
+        leaderboard.sort(key=lambda x: x['score'], reverse=True)
+        leaderboard = leaderboard[:self.size]
+        self._entries = leaderboard
+        self.save(leaderboard)
+        return leaderboard
+
+    def save(self, leaderboard):
+        """Atomically replace the file. Failures are logged and the board stays in memory."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.leaderboard-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(leaderboard, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            log.error("could not save %s: %s", self.path, e)
+            return False
+        self._mtime = self._file_mtime()
+        self._checked_at = time.monotonic()
+        return True
+
+
+class SQLiteLeaderboard:
+    """Leaderboard backed by SQLite, keeping every score ever submitted.
+
+    Reads and add() work as on Leaderboard, with top-K and qualifies()
+    answered from an index on score rather than by loading the table, so it
+    stays fast with tens of thousands of sessions. There is no save(): rows
+    are only ever added, and import_entries() takes scores in bulk. The
+    database runs in WAL mode, so a second process (an admin tool, another
+    cabinet on a share) can read and write alongside the game. The JSON
+    leaderboard at import_path, if there is one, is copied in the first
+    time the database is opened.
+
+    The top entries are cached and only queried again after add(), or when
+    PRAGMA data_version shows another connection committed, checked at most
+    once per check_interval seconds.
+    """
+
+    def __init__(self, path='leaderboard.db', size=5, check_interval=1.0, import_path='leaderboard.json'):
+        self.path = path
+        self.size = size
+        self.check_interval = check_interval
+        self._entries = None
+        self._version = None
+        self._checked_at = 0.0
+        self.db = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                date TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+            CREATE INDEX IF NOT EXISTS scores_by_date ON scores (date);
+            CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, score DESC);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        ''')
+        if import_path:
+            self._import_json(import_path)
+
+    def _import_json(self, path):
+        # IMMEDIATE takes the write lock first, so two processes cannot both import
+        with self._transaction():
+            if self.db.execute("SELECT 1 FROM meta WHERE key = 'imported_json'").fetchone():
+                return
+            try:
+                with open(path) as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                entries = []
+            except (OSError, ValueError) as e:
+                log.warning("could not import %s: %s", path, e)
+                entries = []
+            self.db.executemany('INSERT INTO scores (name, score, date) VALUES (?, ?, ?)',
+                                [(entry['name'], entry['score'], entry.get('date', '')) for entry in entries])
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('imported_json', ?)", (path,))
+        if entries:
+            log.info("imported %d scores from %s", len(entries), path)
+
+    @contextmanager
+    def _transaction(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def _query(self, sql, params=()):
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def _data_version(self):
+        return self.db.execute('PRAGMA data_version').fetchone()[0]
+
+    def entries(self):
+        """Return the top entries, best first."""
+        now = time.monotonic()
+        if self._entries is not None and now - self._checked_at < self.check_interval:
+            return self._entries
+        self._checked_at = now
+        version = self._data_version()
+        if self._entries is None or version != self._version:
+            self._version = version
+            self._entries = self.top_scores(self.size)
+        return self._entries
+
+    def top(self, n=None):
+        return self.entries()[:n]
+
+    def highest_score(self):
+        entries = self.entries()
+        return entries[0]['score'] if entries else 0
+
+    def qualifies(self, score):
+        """Would this score make it onto the board?"""
+        row = self.db.execute('SELECT score FROM scores ORDER BY score DESC, id LIMIT 1 OFFSET ?',
+                              (self.size - 1,)).fetchone()
+        return score > 0 and (row is None or score > row[0])
+
+    def add(self, name, score):
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+        try:
+            with self._transaction():
+                self.db.execute('INSERT INTO scores (name, score, date) VALUES (?, ?, ?)',
+                                (name, score, current_time))
+        except sqlite3.Error as e:
+            log.error("could not save score to %s: %s", self.path, e)
+        self._entries = None
+        return self.entries()
+
+    def import_entries(self, entries):
+        """Add these {'name', 'score', 'date'} entries as further scores.
+
+        Unlike Leaderboard.save() nothing is replaced: history is never
+        rewritten, so importing the same entries twice stores them twice.
+        """
+        try:
+            with self._transaction():
+                self.db.executemany('INSERT INTO scores (name, score, date) VALUES (?, ?, ?)',
+                                    [(entry['name'], entry['score'], entry.get('date', ''))
+                                     for entry in entries])
+        except sqlite3.Error as e:
+            log.error("could not import scores into %s: %s", self.path, e)
+            return False
+        self._entries = None
+        return True
+
+    # Queries beyond the top of the board
+
+    def top_scores(self, n, day=None):
+        """The best n scores of all time, or of one day given as 'YYYY-MM-DD'."""
+        if day is None:
+            return self._query('SELECT name, score, date FROM scores ORDER BY score DESC, id LIMIT ?', (n,))
+        return self._query('SELECT name, score, date FROM scores WHERE date >= ? AND date < ? '
+                           'ORDER BY score DESC, id LIMIT ?', (day, day + '~', n))
+
+    def player_scores(self, name, n=None):
+        """A player's scores, best first."""
+        return self._query('SELECT name, score, date FROM scores WHERE name = ? '
+                           'ORDER BY score DESC, id LIMIT ?', (name, -1 if n is None else n))
+
+    def daily_best(self, days=7):
+        """(day, best score, sessions) for the most recent days with scores."""
+        return [tuple(row) for row in self.db.execute(
+            'SELECT substr(date, 1, 10) AS day, max(score), count(*) FROM scores '
+            'GROUP BY day ORDER BY day DESC LIMIT ?', (days,))]
+
+    def rank(self, score):
+        """1-based position this score would take on the all-time board."""
+        return self.db.execute('SELECT count(*) FROM scores WHERE score >= ?', (score,)).fetchone()[0] + 1
+
+    def count(self):
+        return self.db.execute('SELECT count(*) FROM scores').fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+def open_leaderboard(path='leaderboard.json', size=5):
+    """Leaderboard for a .json path, SQLiteLeaderboard for .db/.sqlite/.sqlite3."""
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteLeaderboard(path, size,
+                                 import_path=os.path.join(os.path.dirname(path), 'leaderboard.json'))
+    return Leaderboard(path, size)
@@ -0,0 +1,88 @@
+"""Object pools and a swap-remove container for the simulation entities.
+
+A Pool hands out recycled instances from a free list. A class that goes in a
+pool gives its constructor body to reset(), and acquire() calls reset() on
+either a recycled instance or a new one. SwapList holds the live entities.
+Each entity remembers its own slot, so removal moves the last entity into
+that slot and pops the end, an O(1) operation that does not keep order.
+"""
+import sys
+
+
+class Pool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.allocated = 0
+        self.reused = 0
+        self.released = 0
+
+    def acquire(self, *args):
+        if self.free:
+            item = self.free.pop()
+            self.reused += 1
+        else:
+            item = self.cls.__new__(self.cls)
+            self.allocated += 1
+        item.reset(*args)
+        return item
+
+    def release(self, item):
+        self.free.append(item)
+        self.released += 1
+
+    def stats(self):
+        item_bytes = sys.getsizeof(self.free[0]) if self.free else 0
+        return {
+            'allocated': self.allocated,
+            'reused': self.reused,
+            'released': self.released,
+            'free': len(self.free),
+            'live': self.allocated + self.reused - self.released,
+            'item_bytes': item_bytes,
+            'pool_bytes': item_bytes * self.allocated,
+        }
+
+
+class SwapList:
+    """Unordered list of entities with O(1) append and remove.
+
+    Items need a `slot` attribute, which the list keeps up to date.
+    """
+
+    def __init__(self):
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def append(self, item):
+        item.slot = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        items = self.items
+        last = items.pop()
+        if last is not item:
+            items[item.slot] = last
+            last.slot = item.slot
+
+    def clear(self):
+        self.items.clear()
+
+
+def report(pools):
+    """Format {name: Pool} as one line per pool for logs and the console."""
+    lines = []
+    for name, pool in pools.items():
+        stats = pool.stats()
+        lines.append(f"{name}: {stats['live']} live, {stats['free']} free, "
+                     f"{stats['allocated']} allocated, {stats['reused']} reused, "
+                     f"{stats['item_bytes']} bytes each")
+    return lines
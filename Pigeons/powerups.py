@@ -0,0 +1,88 @@
+"""Power-up effects, combined once per change instead of scanned every frame.
+
+Every type in simulation.POWERUP_TYPES declares its 'effect' as a dict of
+modifier -> value. MODIFIERS says what each modifier is with nothing active
+and how several active effects on it combine. PowerUps keeps the active
+ones in a min-heap keyed by expiry, so a step only looks at the heap top,
+and recomputes the combined Modifiers only when one starts or expires.
+"""
+import heapq
+import operator
+from collections import namedtuple
+
+
+def _once(current, value):
+    """However many are active, the effect applies once."""
+    return value
+
+
+# modifier: (value with nothing active, how an active effect combines into it)
+MODIFIERS = {
+    'points': (1, operator.mul),  # two 2x power-ups give 4x
+    'extra_stones': (0, operator.add),  # stones refunded per hit on top of the usual one
+    'stone_scale': (1.0, _once),
+    'speed': (1.0, _once),  # birds' speed multiplier
+}
+
+Modifiers = namedtuple('Modifiers', list(MODIFIERS))
+NO_MODIFIERS = Modifiers(*(default for default, _ in MODIFIERS.values()))
+
+
+class PowerUp:
+    __slots__ = ('type', 'start_time', 'duration', 'active')
+
+    def __init__(self, type_name, start_time, duration):
+        self.type = type_name
+        self.start_time = start_time
+        self.duration = duration
+        self.active = True
+
+    def remaining(self, now):
+        return self.duration - (now - self.start_time)
+
+    def is_expired(self, now):
+        return now - self.start_time > self.duration
+
+
+class PowerUps:
+    def __init__(self, types, duration):
+        self.types = types
+        self.duration = duration
+        self.active = []  # in activation order, for the HUD
+        self.modifiers = NO_MODIFIERS
+        self._heap = []
+        self._count = 0  # tie-breaker so the heap never compares PowerUps
+
+    def activate(self, type_name, now):
+        powerup = PowerUp(type_name, now, self.types[type_name].get('duration', self.duration))
+        self._count += 1
+        heapq.heappush(self._heap, (now + powerup.duration, self._count, powerup))
+        self.active.append(powerup)
+        self._recompute()
+        return powerup
+
+    def expire(self, now):
+        """Drop every power-up that ran out by now. Returns True if any did."""
+        heap = self._heap
+        if not heap or not heap[0][2].is_expired(now):
+            return False
+        while heap and heap[0][2].is_expired(now):
+            heapq.heappop(heap)[2].active = False
+        self.active = [powerup for powerup in self.active if powerup.active]
+        self._recompute()
+        return True
+
+    def clear(self):
+        self._heap.clear()
+        self.active = []
+        self.modifiers = NO_MODIFIERS
+
+    def has(self, type_name):
+        return any(powerup.type == type_name for powerup in self.active)
+
+    def _recompute(self):
+        values = NO_MODIFIERS._asdict()
+        for powerup in self.active:
+            for name, value in self.types[powerup.type]['effect'].items():
+                values[name] = MODIFIERS[name][1](values[name], value)
+        self.modifiers = Modifiers(**values)
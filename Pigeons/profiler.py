@@ -0,0 +1,190 @@
+"""Per-phase frame timing, on-screen overlay and trace export.
+
+Wrap each part of a frame in `with profiler.phase('name'):` and close the
+frame with end_frame(). Timings use time.perf_counter_ns. The last `history`
+frames are kept for the overlay's current/avg/p99 columns, and every sample
+can also be streamed to a file: `.json` gives a Chrome trace (open it in
+chrome://tracing or ui.perfetto.dev), `.csv` one row per phase per frame.
+
+Phases may nest, so "step" includes the "birds", "stones" and "collision"
+phases the simulation reports inside it.
+
+Timing runs while the overlay is shown or a trace is open. toggle() only
+shows and hides the overlay, so a trace keeps every frame from open to
+close.
+
+A disabled profiler hands out one shared no-op context, so leaving the
+`with` blocks in the hot path costs next to nothing.
+"""
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, history=300, trace_path=None):
+        self.enabled = enabled
+        self.show_overlay = enabled
+        self.history = history
+        self.frames = deque(maxlen=history)
+        self.phases = {}
+        self.order = []
+        self.counts = {}
+        self.frame_index = 0
+        self._frame_start = None
+        self._current = {}
+        self._spans = []
+        self._trace = None
+        self._trace_kind = None
+        self._trace_first = True
+        self._overlay_lines = []
+        if trace_path:
+            self.open_trace(trace_path)
+
+    def toggle(self):
+        """Show or hide the overlay; an open trace keeps timing either way."""
+        self.show_overlay = not self.show_overlay
+        self.enabled = self.show_overlay or self._trace is not None
+        self._frame_start = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        if self._frame_start is None:
+            self.begin_frame()
+        return _Phase(self, name)
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter_ns()
+            self._current = {}
+            self._spans = []
+
+    def _record(self, name, start, end):
+        self._current[name] = self._current.get(name, 0) + (end - start)
+        self._spans.append((name, start, end))
+        if name not in self.phases:
+            self.phases[name] = deque(maxlen=self.history)
+            self.order.append(name)
+
+    def end_frame(self, **counts):
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        total = end - self._frame_start
+        self.frames.append(total)
+        for name in self.order:
+            self.phases[name].append(self._current.get(name, 0))
+        self.counts = counts
+        if self._trace:
+            self._write_trace(self._frame_start, end, counts)
+        self.frame_index += 1
+        self._frame_start = None
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return samples[-1] / 1e6, sum(samples) / len(samples) / 1e6, p99 / 1e6
+
+    def summary(self):
+        """Return {name: (current_ms, avg_ms, p99_ms)} with the whole frame as 'frame'."""
+        result = {'frame': self._summary(self.frames)}
+        for name in self.order:
+            result[name] = self._summary(self.phases[name])
+        return result
+
+    # Trace export
+
+    def open_trace(self, path):
+        self._trace_kind = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'json'
+        self._trace = open(path, 'w')
+        if self._trace_kind == 'json':
+            self._trace.write('[\n')
+        self._trace_first = True
+        self.enabled = True
+
+    def _write_trace(self, start, end, counts):
+        if self._trace_kind == 'csv':
+            # Long format, so phases that only show up later still line up
+            if self._trace_first:
+                self._trace.write(','.join(['frame', 'phase', 'ms'] + list(counts)) + '\n')
+                self._trace_first = False
+            tail = ''.join(f',{value}' for value in counts.values())
+            self._trace.write(f'{self.frame_index},frame,{(end - start) / 1e6:.4f}{tail}\n')
+            for name, duration in self._current.items():
+                self._trace.write(f'{self.frame_index},{name},{duration / 1e6:.4f}{tail}\n')
+            return
+        # Chrome trace "complete" events, timestamps in microseconds
+        events = [{'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                   'ts': start / 1000, 'dur': (end - start) / 1000,
+                   'args': {'frame': self.frame_index}}]
+        events += [{'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                    'ts': span_start / 1000, 'dur': (span_end - span_start) / 1000}
+                   for name, span_start, span_end in self._spans]
+        events.append({'name': 'entities', 'ph': 'C', 'pid': 1, 'tid': 1, 'ts': start / 1000, 'args': counts})
+        for event in events:
+            self._trace.write(('' if self._trace_first else ',\n') + json.dumps(event))
+            self._trace_first = False
+
+    def close(self):
+        if self._trace:
+            if self._trace_kind == 'json':
+                self._trace.write('\n]\n')
+            self._trace.close()
+            self._trace = None
+            self.enabled = self.show_overlay
+
+    # Overlay
+
+    def overlay_lines(self, refresh_every=15):
+        """Text for the overlay, recomputed every refresh_every frames."""
+        if self.frame_index % refresh_every == 0 or not self._overlay_lines:
+            lines = [f"{'':10s}{'cur':>7s}{'avg':>7s}{'p99':>7s} ms"]
+            for name, (current, average, p99) in self.summary().items():
+                lines.append(f"{name:10.10s}{current:7.2f}{average:7.2f}{p99:7.2f}")
+            lines.append('  '.join(f"{name} {value}" for name, value in self.counts.items()))
+            self._overlay_lines = lines
+        return self._overlay_lines
+
+    def draw_overlay(self, surface, font, render):
+        """Draw the overlay in the top-right corner and return the rect covered.
+
+        render(font, text, color) turns a line into a Surface, so callers can
+        pass their text cache.
+        """
+        lines = [render(font, line, (255, 255, 255)) for line in self.overlay_lines()]
+        width = max(line.get_width() for line in lines) + 16
+        height = sum(line.get_height() for line in lines) + 16
+        x = surface.get_width() - width - 10
+        area = surface.fill((0, 0, 0), (x, 10, width, height))
+        y = 18
+        for line in lines:
+            surface.blit(line, (x + 8, y))
+            y += line.get_height()
+        return area
+
+
+NULL_PROFILER = FrameProfiler()
@@ -0,0 +1,89 @@
+"""Internal render resolution for machines that cannot fill the window.
+
+With a scale below 1 the gameplay is drawn at scale times the window size,
+640x360 at 0.5, so every blit touches a fraction of the pixels. The display
+surface itself is that small: the window is opened with pygame.SCALED and
+SDL stretches the surface over the whole window as it presents it, on the
+GPU where there is one, so no full-size copy is made on the CPU per frame.
+The simulation keeps its WIDTH x HEIGHT coordinates: point() maps them onto
+the view, and sprite sizes go through size() once when they are fetched, so
+the sprite cache holds them already scaled and nothing is resized per frame.
+
+Sizing a SCALED window takes pygame._sdl2, which is private and not in every
+build. Without it the window opens at full size, the view is an offscreen
+surface and present() stretches it over the display with pygame.transform.
+
+Menus keep drawing in full-size coordinates, on canvas, which present_canvas()
+shrinks onto the display; they only redraw on input, so that costs little.
+At scale 1 the view and the canvas are both the window itself.
+"""
+import logging
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+
+class RenderScale:
+    def __init__(self, surface, scale=1.0, size=None, display=None):
+        self.surface = surface
+        self.scale = scale
+        self.scaled = scale != 1.0
+        # The full-size window when the view is drawn offscreen, else None
+        self.display = display
+        if display is not None:
+            self.canvas = display
+        elif self.scaled:
+            self.canvas = pygame.Surface(size, 0, surface)
+        else:
+            self.canvas = surface
+
+    @classmethod
+    def open(cls, size, scale=1.0):
+        """Open the game window at this render scale and return its view."""
+        if scale == 1.0:
+            return cls(pygame.display.set_mode(size))
+        view_size = (round(size[0] * scale), round(size[1] * scale))
+        try:
+            from pygame._sdl2.video import Window
+            surface = pygame.display.set_mode(view_size, pygame.SCALED)
+            # SCALED picks a whole multiple of the view that fits the desktop;
+            # keep the window the size it is at full resolution instead
+            Window.from_display_module().size = size
+            return cls(surface, scale, size)
+        except (ImportError, pygame.error) as e:
+            log.info("scaling the view in software (%s)", e)
+        display = pygame.display.set_mode(size)
+        return cls(pygame.Surface(view_size, 0, display), scale, size, display)
+
+    @property
+    def direct(self):
+        """Whether the view is the display, so rects drawn on it can be updated."""
+        return self.display is None
+
+    def point(self, x, y):
+        """A position in simulation pixels on the view."""
+        return int(x * self.scale), int(y * self.scale)
+
+    def length(self, value):
+        return max(1, round(value * self.scale))
+
+    def size(self, size):
+        return self.length(size[0]), self.length(size[1])
+
+    def present(self):
+        if self.display is not None:
+            pygame.transform.scale(self.surface, self.display.get_size(), self.display)
+        pygame.display.flip()
+
+    def present_canvas(self):
+        """Show a full-size screen drawn on canvas."""
+        if self.scaled and self.display is None:
+            pygame.transform.smoothscale(self.canvas, self.surface.get_size(), self.surface)
+        pygame.display.flip()
+
+    def snapshot(self):
+        """A canvas-sized copy of the view, for screens drawn over the last frame."""
+        if self.scaled:
+            return pygame.transform.scale(self.surface, self.canvas.get_size())
+        return self.surface.copy()
@@ -0,0 +1,155 @@
+"""Deterministic input recording and replay.
+
+A session is fully determined by its RNG seed, tick rate and the keys held on
+every physics tick, since GameState runs off simulated time only. A recording
+stores exactly that: a fixed header followed by run-length encoded key
+bitmasks (a held key usually stays held for many ticks, so a typical session
+is a few hundred bytes).
+
+Replay a file headless at full speed with:
+
+    python replay.py session.pgr [--backend numpy]
+"""
+import os
+import struct
+import time
+
+from simulation import FPS, GameState, Inputs, NO_INPUT, pool_report
+
+MAGIC = b'PGNR'
+VERSION = 1
+# magic, version, seed, tick rate, high score, final score, ticks, runs
+HEADER = struct.Struct('<4sBQHIIII')
+RUN = struct.Struct('<HB')
+MAX_RUN = 0xFFFF
+
+KEY_BITS = {name: 1 << i for i, name in enumerate(Inputs._fields)}
+
+
+def pack_inputs(inputs):
+    mask = 0
+    for name, held in zip(Inputs._fields, inputs):
+        if held:
+            mask |= KEY_BITS[name]
+    return mask
+
+
+def unpack_inputs(mask):
+    return Inputs(*(bool(mask & KEY_BITS[name]) for name in Inputs._fields))
+
+
+def session_path(path, seed, started=None):
+    """path with the start time and seed worked into the name, one file per game.
+
+    session.pgr becomes session-20250519-171502-3f2a.pgr, so recordings sort
+    by when they were played and two games never share a file.
+    """
+    base, ext = os.path.splitext(path)
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+    return f"{base}-{stamp}-{seed & 0xFFFF:04x}{ext or '.pgr'}"
+
+
+class InputRecorder:
+    def __init__(self, path, seed, tick_rate=FPS, high_score=0):
+        self.path = path
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.high_score = high_score
+        self.ticks = 0
+        self.runs = []
+
+    def record(self, inputs):
+        mask = pack_inputs(inputs)
+        if self.runs and self.runs[-1][1] == mask and self.runs[-1][0] < MAX_RUN:
+            self.runs[-1][0] += 1
+        else:
+            self.runs.append([1, mask])
+        self.ticks += 1
+
+    def save(self, final_score=0):
+        with open(self.path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.tick_rate, self.high_score,
+                                final_score, self.ticks, len(self.runs)))
+            f.write(b''.join(RUN.pack(count, mask) for count, mask in self.runs))
+
+
+class Replay:
+    def __init__(self, seed, tick_rate, high_score, final_score, ticks, runs):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.high_score = high_score
+        self.final_score = final_score
+        self.ticks = ticks
+        self.runs = runs
+        self.played = 0
+        self._stream = self.inputs()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, tick_rate, high_score, final_score, ticks, run_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} Pigeons recording")
+        runs = [RUN.unpack_from(data, HEADER.size + i * RUN.size) for i in range(run_count)]
+        return cls(seed, tick_rate, high_score, final_score, ticks, runs)
+
+    def __len__(self):
+        return self.ticks
+
+    def inputs(self):
+        """Yield the recorded Inputs for every tick in order."""
+        for count, mask in self.runs:
+            inputs = unpack_inputs(mask)
+            for _ in range(count):
+                yield inputs
+
+    def next_inputs(self):
+        """Return the next tick's Inputs, or no keys once the recording ends."""
+        self.played += 1
+        return next(self._stream, NO_INPUT)
+
+    @property
+    def finished(self):
+        """True once next_inputs() has handed out every recorded tick.
+
+        A game recorded until game over ends on its own by then; one saved
+        when the player left mid-game would otherwise idle on forever.
+        """
+        return self.played >= self.ticks
+
+    def new_state(self, backend='python'):
+        return GameState(high_score=self.high_score, seed=self.seed, backend=backend)
+
+
+def run_headless(replay, backend='python'):
+    """Play a recording back with no display as fast as possible.
+
+    Returns the final GameState and the wall-clock seconds it took.
+    """
+    state = replay.new_state(backend)
+    dt = 1.0 / replay.tick_rate
+    start = time.perf_counter()
+    for inputs in replay.inputs():
+        state.step(inputs, dt)
+        if state.game_over:
+            break
+    return state, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a Pigeons! recording headless.")
+    parser.add_argument('path')
+    parser.add_argument('--backend', default='python', choices=['python', 'numpy'])
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    state, elapsed = run_headless(replay, args.backend)
+    print(f"{len(replay)} ticks at {replay.tick_rate} Hz in {elapsed:.3f}s "
+          f"({len(replay) / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"score {state.score} (recorded {replay.final_score})"
+          + ("" if state.score == replay.final_score else "  MISMATCH"))
+    for line in pool_report():
+        print(line)
@@ -0,0 +1,108 @@
+"""Scene manager that owns the one event loop of the game.
+
+A Scene with `fps` set is animated: it is updated and drawn every frame,
+capped at that rate. A Scene with `fps = None` is idle: the manager blocks
+in pygame.event.wait() until input arrives or idle_timeout passes, and only
+redraws after the scene calls invalidate(). A menu sitting in attract mode
+therefore costs next to no CPU.
+
+Events that arrive in the same batch after a scene asks to switch go to the
+scene it switches to, so keys typed ahead and a queued quit are not lost.
+"""
+import pygame
+
+
+class Scene:
+    fps = None  # frame cap for animated scenes, None for idle ones
+    idle_timeout = 1000  # ms an idle scene sleeps before update() runs anyway
+
+    def __init__(self):
+        self.manager = None
+        self.needs_redraw = True
+
+    def enter(self):
+        pass
+
+    def leave(self):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, elapsed):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def present(self):
+        pygame.display.flip()
+
+    def invalidate(self):
+        self.needs_redraw = True
+
+
+class SceneManager:
+    def __init__(self, screen, clock):
+        self.screen = screen
+        self.clock = clock
+        self.scene = None
+        self.running = False
+        self.frames_drawn = 0
+        self._next = None
+        self._carried = []  # events that arrived after a switch, for the next scene
+
+    def switch(self, scene):
+        """Make scene current once the running frame finishes."""
+        self._next = scene
+
+    def quit(self):
+        self.running = False
+
+    def _poll(self, scene):
+        if scene.fps:
+            elapsed = self.clock.tick(scene.fps)
+            return pygame.event.get(), elapsed / 1000
+        if scene.needs_redraw:
+            return pygame.event.get(), self.clock.tick() / 1000
+        first = pygame.event.wait(scene.idle_timeout)
+        events = [] if first.type == pygame.NOEVENT else [first] + pygame.event.get()
+        return events, self.clock.tick() / 1000
+
+    def run(self, scene):
+        self.switch(scene)
+        self.running = True
+        while self.running:
+            if self._next is not None:
+                if self.scene is not None:
+                    self.scene.leave()
+                self.scene, self._next = self._next, None
+                self.scene.manager = self
+                self.scene.needs_redraw = True
+                self.scene.enter()
+                self.clock.tick()
+            scene = self.scene
+
+            events, elapsed = self._poll(scene)
+            if self._carried:
+                events, self._carried = self._carried + events, []
+            for index, event in enumerate(events):
+                if event.type == pygame.QUIT:
+                    self.running = False
+                    break
+                scene.handle_event(event)
+                if self._next is not None:
+                    # Keys typed ahead belong to the scene being switched to
+                    self._carried = events[index + 1:]
+                    break
+            if not self.running or self._next is not None:
+                continue
+
+            scene.update(elapsed)
+            if self._next is None and (scene.fps or scene.needs_redraw):
+                scene.draw(self.screen)
+                scene.present()
+                scene.needs_redraw = False
+                self.frames_drawn += 1
+        if self.scene is not None:
+            self.scene.leave()
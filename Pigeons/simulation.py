@@ -0,0 +1,442 @@
+"""Headless simulation core for Pigeons!
+
+Nothing in here touches the display, the mixer or the clock, so a GameState
+can be stepped with no window at all. PhysicsOriginal.py draws on top of it.
+"""
+import math
+import random
+from collections import namedtuple
+
+from broadphase import SpatialHash
+from pool import Pool, SwapList, report
+from powerups import PowerUps
+from profiler import NULL_PROFILER
+
+WIDTH, HEIGHT = 1280, 720
+FPS = 60
+GRAVITY = 9.8
+boy_pos = (100, HEIGHT - 120)
+
+STONE_TIME_STEP = 0.1  # flight time a stone gains per frame
+THROW_COOLDOWN = 0.5  # flight time the last stone needs before the next throw
+BIRD_SPAWN_INTERVAL = 90  # frames
+START_STONES = 20
+BIRD_RADIUS = 28
+POWERUP_RADIUS = 40  # half of the 80x80 power-up image
+MAX_COLLISION_RADIUS = max(BIRD_RADIUS, POWERUP_RADIUS)
+
+POWERUP_DURATION = 5  # seconds
+BIRD_SPEED = (2, 5)  # range of pixels per frame
+# 'effect' maps powerups.MODIFIERS names to values; a type may also set its own 'duration'
+POWERUP_TYPES = {
+    'red': {'name': '2x Points', 'color': (255, 0, 0), 'image': 'powerup_2x.png',
+            'effect': {'points': 2}},
+    'blue': {'name': 'Big Stones', 'color': (0, 0, 255), 'image': 'powerup_bigstones.png',
+             'effect': {'stone_scale': 2.0}},
+    'green': {'name': 'Extra Stones', 'color': (0, 255, 0), 'image': 'powerup_extrastones.png',
+              'effect': {'extra_stones': 1}},
+    'yellow': {'name': 'Slow Motion', 'color': (255, 255, 0), 'image': 'powerup_slow.png',
+               'effect': {'speed': 0.5}},
+}
+
+# Tunable rules of a session; GameState(config=...) overrides the defaults above
+Config = namedtuple('Config', ['gravity', 'powerup_duration', 'bird_speed', 'spawn_interval', 'start_stones'],
+                    defaults=(GRAVITY, POWERUP_DURATION, BIRD_SPEED, BIRD_SPAWN_INTERVAL, START_STONES))
+DEFAULT_CONFIG = Config()
+
+# Held keys for one step
+Inputs = namedtuple('Inputs', ['up', 'down', 'left', 'right', 'space'], defaults=(False,) * 5)
+NO_INPUT = Inputs()
+
+# Events returned by GameState.step, in the order they happened
+THROW = 'throw'
+HIT = 'hit'
+POWERUP = 'powerup'
+HIGH_SCORE = 'high_score'
+
+
+# Stones and birds come out of the pools in pool.py, which call reset() on a
+# recycled instance instead of building a new one; slot and serial belong to
+# the world that holds them.
+
+class Bird:
+    __slots__ = ('x', 'prev_x', 'y', 'speed', 'radius', 'spawn_time', 'powerup_type', 'slot', 'serial')
+
+    def __init__(self, rng, spawn_time=0.0, speed_range=BIRD_SPEED):
+        self.reset(rng, spawn_time, speed_range)
+
+    def reset(self, rng, spawn_time=0.0, speed_range=BIRD_SPEED):
+        self.x = WIDTH
+        self.prev_x = self.x
+        self.y = rng.randint(100, 300)
+        self.speed = rng.uniform(*speed_range)  # before the world's speed multiplier
+        self.radius = 20
+        self.spawn_time = spawn_time
+        # Randomly assign power-up type to some birds
+        self.powerup_type = rng.choice(list(POWERUP_TYPES.keys())) if rng.random() < 0.2 else None
+        self.slot = -1
+        self.serial = 0
+
+    def move(self, frames=1.0, speed_scale=1.0):
+        self.prev_x = self.x
+        self.x -= self.speed * (frames * speed_scale)
+
+
+class Stone:
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'angle', 'velocity', 'time', 'scale', 'slot', 'serial')
+
+    def __init__(self, angle, velocity, scale=1.0):
+        self.reset(angle, velocity, scale)
+
+    def reset(self, angle, velocity, scale=1.0):
+        self.x = boy_pos[0] + 90
+        self.y = boy_pos[1] + 7
+        self.prev_x, self.prev_y = self.x, self.y
+        self.angle = math.radians(angle)
+        self.velocity = velocity
+        self.time = 0
+        self.scale = scale
+        self.slot = -1
+        self.serial = 0
+
+    def update(self, frames=1.0, gravity=GRAVITY):
+        t = self.time
+        self.prev_x, self.prev_y = self.x, self.y
+        self.x = boy_pos[0] + 90 + self.velocity * math.cos(self.angle) * t
+        self.y = boy_pos[1] + 7 - (self.velocity * math.sin(self.angle) * t - 0.5 * gravity * t ** 2)
+        self.time += STONE_TIME_STEP * frames
+
+    def is_off_screen(self):
+        return self.x > WIDTH or self.y > HEIGHT or self.y < 0
+
+
+stone_pool = Pool(Stone)
+bird_pool = Pool(Bird)
+
+
+def pool_report():
+    """Allocation counts for the stone and bird pools, one line each."""
+    return report({'stones': stone_pool, 'birds': bird_pool})
+
+
+def collision_circle(bird):
+    """Return the (x, y, radius) circle a stone has to enter to hit bird."""
+    if bird.powerup_type:
+        # For powerups, use the center of the 80x80 image
+        return bird.x + 40, bird.y + 40, POWERUP_RADIUS
+    # For regular birds, use the original collision radius
+    return bird.x + 25, bird.y + 20, BIRD_RADIUS
+
+
+def check_collision(stone, bird):
+    bird_x, bird_y, collision_radius = collision_circle(bird)
+
+    # Calculate distance between centers
+    dx = stone.x - bird_x
+    dy = stone.y - bird_y
+    distance = math.hypot(dx, dy)
+
+    return distance < collision_radius
+
+
+def swept_contact(stone, bird):
+    """Return how far through the last step (0 to 1) stone first touched bird, or None.
+
+    Both moved during the step, so the test runs in the bird's frame, where
+    the stone travels in a straight line from where it started relative to
+    the bird to where it ended. A fast stone cannot skip over a bird between
+    two steps, however low the tick rate.
+    """
+    bird_x, bird_y, radius = collision_circle(bird)
+    # Start and end of the stone's path relative to the bird's center
+    ax = stone.prev_x - (bird_x - bird.x + bird.prev_x)
+    ay = stone.prev_y - bird_y
+    dx = (stone.x - bird_x) - ax
+    dy = (stone.y - bird_y) - ay
+    c = ax * ax + ay * ay - radius * radius
+    if c < 0:
+        return 0.0
+    b = ax * dx + ay * dy
+    if b >= 0:
+        return None  # moving away from the center the whole step
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    entry = (-b - math.sqrt(disc)) / a
+    return entry if entry <= 1 else None
+
+
+class EntityWorld:
+    """Stones and birds as plain Python objects, one update call each.
+
+    Entities live in SwapLists, so their order changes as others are removed;
+    serial numbers record throw and spawn order, and collisions resolve in
+    that order. Stones and birds that are culled or hit go back to their
+    pools, hits only at the start of the next advance so the caller can still
+    read them.
+
+    Collisions go through a spatial hash first; pair_checks counts every
+    stone-bird pair a brute-force pass would have tested and narrow_checks
+    the ones that actually reached swept_contact.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.stones = SwapList()
+        self.birds = SwapList()
+        self.grid = SpatialHash(MAX_COLLISION_RADIUS)
+        self.pair_checks = 0
+        self.narrow_checks = 0
+        self.speed_scale = 1.0
+        self._serial = 0
+        self._spent = []
+
+    def spawn_stone(self, angle, velocity, scale=1.0):
+        self.add_stone(stone_pool.acquire(angle, velocity, scale))
+
+    def spawn_bird(self, rng, spawn_time):
+        self.add_bird(bird_pool.acquire(rng, spawn_time, self.config.bird_speed))
+
+    def add_stone(self, stone):
+        self._serial += 1
+        stone.serial = self._serial
+        self.stones.append(stone)
+
+    def add_bird(self, bird):
+        self._serial += 1
+        bird.serial = self._serial
+        self.birds.append(bird)
+
+    def clear(self):
+        """Return every entity to its pool."""
+        self._release_spent()
+        for stone in self.stones:
+            stone_pool.release(stone)
+        for bird in self.birds:
+            bird_pool.release(bird)
+        self.stones.clear()
+        self.birds.clear()
+
+    def _release_spent(self):
+        for entity in self._spent:
+            (stone_pool if isinstance(entity, Stone) else bird_pool).release(entity)
+        self._spent.clear()
+
+    def stone_total(self):
+        return len(self.stones)
+
+    def bird_total(self):
+        return len(self.birds)
+
+    def newest_stone_time(self):
+        # Every stone ages at the same rate, so the newest one is the youngest
+        return min((stone.time for stone in self.stones), default=None)
+
+    def set_speed(self, game_speed):
+        self.speed_scale = game_speed
+
+    def advance(self, frames, profiler=NULL_PROFILER):
+        """Move everything, cull what left the screen and return the birds hit."""
+        self._release_spent()
+        # Walk backwards so a swap-remove only moves in an entity already done
+        with profiler.phase('birds'):
+            birds = self.birds
+            speed_scale = self.speed_scale
+            for index in range(len(birds) - 1, -1, -1):
+                bird = birds[index]
+                bird.move(frames, speed_scale)
+                if bird.x < -50:
+                    birds.remove(bird)
+                    bird_pool.release(bird)
+        with profiler.phase('stones'):
+            stones = self.stones
+            gravity = self.config.gravity
+            for index in range(len(stones) - 1, -1, -1):
+                stone = stones[index]
+                stone.update(frames, gravity)
+                if stone.is_off_screen():
+                    stones.remove(stone)
+                    stone_pool.release(stone)
+        if not self.stones or not self.birds:
+            return []
+        with profiler.phase('collision'):
+            return self._collide()
+
+    def _collide(self):
+        grid = self.grid
+        grid.clear()
+        shift = 0.0  # furthest any bird moved this step
+        for bird in self.birds:
+            bird_x, bird_y, _ = collision_circle(bird)
+            grid.insert(bird, bird_x, bird_y)
+            if bird.prev_x - bird.x > shift:
+                shift = bird.prev_x - bird.x
+
+        contacts = []
+        checks = 0
+        for stone in self.stones:
+            # Birds fly left, so seen from a bird the stone started further left
+            nearby = grid.query_rect(min(stone.prev_x - shift, stone.x), min(stone.prev_y, stone.y),
+                                     max(stone.prev_x, stone.x), max(stone.prev_y, stone.y))
+            if not nearby:
+                continue
+            checks += len(nearby)
+            touched = []
+            for bird in nearby:
+                entry = swept_contact(stone, bird)
+                if entry is not None:
+                    touched.append((entry, bird.serial, bird))
+            if touched:
+                contacts.append((stone.serial, stone, touched))
+        self.pair_checks += len(self.stones) * len(self.birds)
+        self.narrow_checks += checks
+        if not contacts:
+            return []
+
+        # Oldest stone first, and each takes the bird it reached first that
+        # an earlier stone has not already claimed, the oldest on a tie
+        contacts.sort(key=lambda contact: contact[0])
+        hits = []
+        for _, stone, touched in contacts:
+            free = [contact for contact in touched if contact[2].slot >= 0]
+            if not free:
+                continue
+            bird = min(free, key=lambda contact: contact[:2])[2]
+            self.birds.remove(bird)
+            self.stones.remove(stone)
+            bird.slot = stone.slot = -1
+            self._spent += (bird, stone)
+            hits.append(bird)
+        return hits
+
+    @property
+    def skipped_checks(self):
+        """Stone-bird pairs the grid ruled out without a distance test."""
+        return self.pair_checks - self.narrow_checks
+
+
+def make_world(backend='python', config=DEFAULT_CONFIG):
+    if backend == 'python':
+        return EntityWorld(config)
+    if backend == 'numpy':
+        from soa import ArrayWorld
+        return ArrayWorld(config)
+    raise ValueError(f"unknown backend {backend!r}")
+
+
+class GameState:
+    """One session of play, advanced with step().
+
+    `time` is simulated seconds, and power-up expiry runs off it rather than
+    the wall clock. Pass a seed to get the same birds every run.
+    """
+
+    def __init__(self, high_score=0, seed=None, backend='python', config=DEFAULT_CONFIG):
+        self.rng = random.Random(seed)
+        self.high_score = high_score
+        self.backend = backend
+        self.config = config
+        self.profiler = NULL_PROFILER
+        self.world = make_world(backend, config)
+        self.powerups = PowerUps(POWERUP_TYPES, config.powerup_duration)
+        self.reset()
+
+    def reset(self):
+        self.angle = 45
+        self.velocity = 50
+        self.world.clear()
+        self.score = 0
+        self.stone_count = self.config.start_stones
+        self.bird_spawn_timer = 0
+        self.aim_timer = 0.0
+        self.high_score_achieved = False
+        self.powerups.clear()
+        self.world.set_speed(self.powerups.modifiers.speed)
+        self.time = 0.0
+        self.frame = 0
+        self.game_over = False
+
+    @property
+    def stones(self):
+        return self.world.stones
+
+    @property
+    def birds(self):
+        return self.world.birds
+
+    @property
+    def active_powerups(self):
+        return self.powerups.active
+
+    def has_powerup(self, type_name):
+        return self.powerups.has(type_name)
+
+    @property
+    def stone_scale(self):
+        return self.powerups.modifiers.stone_scale
+
+    @property
+    def game_speed(self):
+        return self.powerups.modifiers.speed
+
+    def step(self, inputs=NO_INPUT, dt=1.0 / FPS):
+        """Advance the game by dt seconds and return the events that fired."""
+        events = []
+        if self.game_over:
+            return events
+        frames = dt * FPS
+        self.time += dt
+        self.frame += 1
+
+        # Aim moves one unit per 60 Hz frame whatever the tick rate
+        self.aim_timer += frames
+        aim_steps = int(self.aim_timer)
+        self.aim_timer -= aim_steps
+        if inputs.up:
+            self.angle = min(self.angle + aim_steps, 90)
+        if inputs.down:
+            self.angle = max(self.angle - aim_steps, 1)
+        if inputs.right:
+            self.velocity = min(self.velocity + aim_steps, 150)
+        if inputs.left:
+            self.velocity = max(self.velocity - aim_steps, 10)
+        if inputs.space:
+            newest = self.world.newest_stone_time()
+            if self.stone_count > 0 and (newest is None or newest > THROW_COOLDOWN):
+                self.world.spawn_stone(self.angle, self.velocity, self.stone_scale)
+                self.stone_count -= 1
+                events.append(THROW)
+
+        # A bird comes on the first frame past spawn_interval, so every
+        # spawn_interval + 1 frames; carrying the overshoot over keeps that
+        # period the same at every tick rate
+        self.bird_spawn_timer += frames
+        if self.bird_spawn_timer > self.config.spawn_interval:
+            self.world.spawn_bird(self.rng, self.time)
+            self.bird_spawn_timer -= self.config.spawn_interval + 1
+
+        for bird in self.world.advance(frames, self.profiler):
+            self._score_hit(bird, events)
+
+        if self.stone_count == 0 and self.world.stone_total() == 0:
+            self.game_over = True
+            return events
+
+        # Modifiers only change when a power-up starts or runs out
+        if self.powerups.expire(self.time) or POWERUP in events:
+            self.world.set_speed(self.game_speed)
+        return events
+
+    def _score_hit(self, bird, events):
+        events.append(HIT)
+        # Check for power-up activation
+        if bird.powerup_type:
+            events.append(POWERUP)
+            self.powerups.activate(bird.powerup_type, self.time)
+        modifiers = self.powerups.modifiers
+        self.score += 100 * modifiers.points
+        if self.score > self.high_score and not self.high_score_achieved:
+            events.append(HIGH_SCORE)
+            self.high_score_achieved = True
+        self.stone_count += 1 + modifiers.extra_stones
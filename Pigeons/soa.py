@@ -0,0 +1,237 @@
+"""NumPy struct-of-arrays backend for the simulation.
+
+ArrayWorld keeps stones and birds in parallel NumPy arrays and moves, culls
+and collides all of them with a handful of array operations per step. Only
+the stone-bird pairs that a sweep over the birds sorted by x leaves within
+reach get the full swept test. It is a drop-in replacement for
+simulation.EntityWorld: same hits, same order, same culling. Select it with
+GameState(backend='numpy').
+"""
+from collections import namedtuple
+
+import math
+
+import numpy as np
+
+from profiler import NULL_PROFILER
+from simulation import (
+    WIDTH, HEIGHT, boy_pos, STONE_TIME_STEP, POWERUP_TYPES, DEFAULT_CONFIG, Bird,
+)
+
+POWERUP_KEYS = [None] + list(POWERUP_TYPES.keys())
+POWERUP_CODES = {type_name: code for code, type_name in enumerate(POWERUP_KEYS)}
+
+# Read-only snapshots handed to the renderer and to GameState._score_hit
+StoneView = namedtuple('StoneView', ['x', 'y', 'prev_x', 'prev_y', 'time', 'scale'])
+BirdView = namedtuple('BirdView', ['x', 'y', 'prev_x', 'speed', 'powerup_type', 'spawn_time'])
+
+
+class _Columns:
+    """A set of equally long 1-D arrays that grow by doubling."""
+
+    def __init__(self, capacity, **dtypes):
+        self.size = 0
+        self.names = list(dtypes)
+        for name, dtype in dtypes.items():
+            setattr(self, '_' + name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        return getattr(self, '_' + name)[:self.size]
+
+    def append(self, **values):
+        capacity = len(getattr(self, '_' + self.names[0]))
+        if self.size == capacity:
+            for name in self.names:
+                old = getattr(self, '_' + name)
+                grown = np.zeros(capacity * 2, dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, '_' + name, grown)
+        for name, value in values.items():
+            getattr(self, '_' + name)[self.size] = value
+        self.size += 1
+
+    def keep(self, mask):
+        """Drop every row where mask is False, preserving order."""
+        kept = int(mask.sum())
+        if kept == self.size:
+            return
+        for name in self.names:
+            data = getattr(self, '_' + name)
+            data[:kept] = data[:self.size][mask]
+        self.size = kept
+
+
+class ArrayWorld:
+    """Stones and birds stored column-wise and updated in bulk."""
+
+    def __init__(self, config=DEFAULT_CONFIG, capacity=64):
+        self.config = config
+        self.stone_data = _Columns(capacity, angle=np.float64, velocity=np.float64,
+                                   time=np.float64, x=np.float64, y=np.float64,
+                                   prev_x=np.float64, prev_y=np.float64, scale=np.float64)
+        self.bird_data = _Columns(capacity, x=np.float64, prev_x=np.float64, y=np.float64,
+                                  speed=np.float64, powerup=np.int8, spawn_time=np.float64)
+        self.speed_scale = 1.0
+        self._bird = None  # rolls the random bird attributes, then gets copied in
+
+    def spawn_stone(self, angle, velocity, scale=1.0):
+        x, y = boy_pos[0] + 90, boy_pos[1] + 7
+        self.stone_data.append(angle=math.radians(angle), velocity=velocity, time=0.0,
+                               x=x, y=y, prev_x=x, prev_y=y, scale=scale)
+
+    def spawn_bird(self, rng, spawn_time):
+        if self._bird is None:
+            self._bird = Bird(rng, spawn_time, self.config.bird_speed)
+        else:
+            self._bird.reset(rng, spawn_time, self.config.bird_speed)
+        self.add_bird(self._bird)
+
+    def clear(self):
+        self.stone_data.size = 0
+        self.bird_data.size = 0
+
+    def add_stone(self, stone):
+        self.stone_data.append(angle=stone.angle, velocity=stone.velocity, time=stone.time,
+                               x=stone.x, y=stone.y, prev_x=stone.prev_x, prev_y=stone.prev_y,
+                               scale=stone.scale)
+
+    def add_bird(self, bird):
+        self.bird_data.append(x=bird.x, prev_x=bird.prev_x, y=bird.y, speed=bird.speed,
+                              powerup=POWERUP_CODES[bird.powerup_type], spawn_time=bird.spawn_time)
+
+    def stone_total(self):
+        return len(self.stone_data)
+
+    def bird_total(self):
+        return len(self.bird_data)
+
+    def newest_stone_time(self):
+        if not self.stone_data.size:
+            return None
+        return float(self.stone_data.column('time')[-1])
+
+    def set_speed(self, game_speed):
+        self.speed_scale = game_speed
+
+    @property
+    def stones(self):
+        data = self.stone_data
+        return [StoneView(*row) for row in zip(
+            data.column('x').tolist(), data.column('y').tolist(),
+            data.column('prev_x').tolist(), data.column('prev_y').tolist(),
+            data.column('time').tolist(), data.column('scale').tolist())]
+
+    @property
+    def birds(self):
+        data = self.bird_data
+        return [BirdView(x, y, prev_x, speed, POWERUP_KEYS[code], spawn_time)
+                for x, y, prev_x, speed, code, spawn_time in zip(
+                    data.column('x').tolist(), data.column('y').tolist(), data.column('prev_x').tolist(),
+                    data.column('speed').tolist(),
+                    data.column('powerup').tolist(), data.column('spawn_time').tolist())]
+
+    def advance(self, frames, profiler=NULL_PROFILER):
+        """Move everything, cull what left the screen and return the birds hit."""
+        with profiler.phase('birds'):
+            birds = self.bird_data
+            bx = birds.column('x')
+            birds.column('prev_x')[:] = bx
+            bx -= birds.column('speed') * (frames * self.speed_scale)
+            birds.keep(bx >= -50)
+        with profiler.phase('stones'):
+            self._move_stones(frames)
+
+        if not self.stone_data.size or not birds.size:
+            return []
+        with profiler.phase('collision'):
+            return self._collide()
+
+    def _move_stones(self, frames):
+        stones = self.stone_data
+        t = stones.column('time')
+        angle = stones.column('angle')
+        velocity = stones.column('velocity')
+        sx = stones.column('x')
+        sy = stones.column('y')
+        stones.column('prev_x')[:] = sx
+        stones.column('prev_y')[:] = sy
+        sx[:] = boy_pos[0] + 90 + velocity * np.cos(angle) * t
+        sy[:] = boy_pos[1] + 7 - (velocity * np.sin(angle) * t - 0.5 * self.config.gravity * t ** 2)
+        t += STONE_TIME_STEP * frames
+        stones.keep(~((sx > WIDTH) | (sy > HEIGHT) | (sy < 0)))
+
+    def _collide(self):
+        stones = self.stone_data
+        birds = self.bird_data
+        bx = birds.column('x')
+        powerup = birds.column('powerup') != 0
+        # Powerup birds are 80x80 with a 40 px radius, regular ones 50x40 with 28
+        cx = bx + np.where(powerup, 40.0, 25.0)
+        cy = birds.column('y') + np.where(powerup, 40.0, 20.0)
+        radius = np.where(powerup, 40.0, 28.0)
+        shift = birds.column('prev_x') - bx  # how far each bird moved this step
+
+        # Sort and sweep on x: seen from a bird the stone started further
+        # left, by as much as the bird moved, so each stone reaches the birds
+        # whose centers lie within 40 px of that widened span
+        sx, sy = stones.column('x'), stones.column('y')
+        prev_sx, prev_sy = stones.column('prev_x'), stones.column('prev_y')
+        order = np.argsort(cx, kind='stable')
+        sorted_cx = cx[order]
+        first = np.searchsorted(sorted_cx, np.minimum(prev_sx - shift.max(), sx) - 40.0, 'left')
+        last = np.searchsorted(sorted_cx, np.maximum(prev_sx, sx) + 40.0, 'right')
+        counts = np.maximum(last - first, 0)
+        total = int(counts.sum())
+        if not total:
+            return []
+        stone_index = np.repeat(np.arange(stones.size), counts)
+        ends = np.cumsum(counts)
+        bird_index = order[np.repeat(first - ends + counts, counts) + np.arange(total)]
+        # Then drop the birds outside the stone's vertical span
+        reach = radius[bird_index]
+        near = ((cy[bird_index] + reach >= np.minimum(prev_sy, sy)[stone_index])
+                & (cy[bird_index] - reach <= np.maximum(prev_sy, sy)[stone_index]))
+        stone_index, bird_index, reach = stone_index[near], bird_index[near], reach[near]
+        if not len(stone_index):
+            return []
+
+        # Swept test in each bird's frame, the same arithmetic as simulation.swept_contact
+        bird_cx, bird_cy = cx[bird_index], cy[bird_index]
+        ax = prev_sx[stone_index] - (bird_cx + shift[bird_index])
+        ay = prev_sy[stone_index] - bird_cy
+        dx = (sx[stone_index] - bird_cx) - ax
+        dy = (sy[stone_index] - bird_cy) - ay
+        c = ax * ax + ay * ay - reach * reach
+        b = ax * dx + ay * dy
+        a = dx * dx + dy * dy
+        disc = b * b - a * c
+        with np.errstate(divide='ignore', invalid='ignore'):
+            root = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+        entry = np.where(c < 0, 0.0, np.where((b < 0) & (disc >= 0) & (root <= 1), root, np.inf))
+        touching = entry < np.inf
+        if not touching.any():
+            return []
+
+        # Each stone takes the bird it reached first that an earlier stone has
+        # not already claimed, the oldest on a tie, exactly like EntityWorld
+        stone_index, bird_index, entry = stone_index[touching], bird_index[touching], entry[touching]
+        ranked = np.lexsort((bird_index, entry, stone_index))
+        hits = []
+        taken = np.zeros(birds.size, dtype=bool)
+        stone_alive = np.ones(stones.size, dtype=bool)
+        for stone, bird in zip(stone_index[ranked].tolist(), bird_index[ranked].tolist()):
+            if not stone_alive[stone] or taken[bird]:
+                continue
+            taken[bird] = True
+            stone_alive[stone] = False
+            hits.append(BirdView(float(bx[bird]), float(birds.column('y')[bird]),
+                                 float(birds.column('prev_x')[bird]),
+                                 float(birds.column('speed')[bird]),
+                                 POWERUP_KEYS[int(birds.column('powerup')[bird])],
+                                 float(birds.column('spawn_time')[bird])))
+        stones.keep(stone_alive)
+        birds.keep(~taken)
+        return hits
@@ -0,0 +1,139 @@
+"""Sound effects with reserved channels, rate limiting and a decoded-PCM cache.
+
+Every effect belongs to a category, and every category owns a fixed set of
+reserved mixer channels. A burst of explosions can therefore fill only the
+explosion channels and never cut off a throw or the high-score fanfare. When
+all of a category's channels are busy the new trigger is dropped rather than
+stealing a channel somewhere unpredictable. A trigger of the same effect
+within min_interval seconds of the last one is coalesced into it (also
+counted as dropped).
+
+Sounds are loaded as PCM in the mixer's own format. The first boot decodes
+each file (the explosion is an MP3) and writes the raw samples to cache_dir,
+keyed by a hash of the file and the mixer format; later boots build the
+Sound straight from those samples. decode() only touches files and pygame's
+Sound constructor, so it may run on the asset loader thread.
+"""
+import hashlib
+import io
+import logging
+import math
+import os
+import time
+from collections import Counter
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+
+class Cue:
+    """A named effect with a play() method, for code that wants a Sound-like object."""
+
+    def __init__(self, bank, name):
+        self.bank = bank
+        self.name = name
+
+    def play(self):
+        return self.bank.play(self.name)
+
+
+class SoundBank:
+    def __init__(self, categories, cache_dir=None):
+        """categories maps category name -> number of channels it reserves."""
+        self.categories = categories
+        self.cache_dir = cache_dir
+        self.sounds = {}
+        self.effects = {}  # name -> (category, min_interval)
+        self.channels = {}
+        self.played = Counter()
+        self.dropped = Counter()
+        self.cache_hits = 0
+        self._last_played = {}
+
+    def reserve(self):
+        """Claim the channels once the mixer is up. Channels past them stay free for play()."""
+        total = sum(self.categories.values())
+        if pygame.mixer.get_num_channels() < total + 2:
+            pygame.mixer.set_num_channels(total + 2)
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for category, count in self.categories.items():
+            self.channels[category] = [pygame.mixer.Channel(index) for index in range(first, first + count)]
+            first += count
+
+    def define(self, name, category, min_interval=0.0):
+        if category not in self.categories:
+            raise ValueError(f"unknown sound category {category!r}")
+        self.effects[name] = (category, min_interval)
+
+    # Loading
+
+    def _cache_path(self, data):
+        mixer_format = '-'.join(map(str, pygame.mixer.get_init()))
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{digest}-{mixer_format}.pcm')
+
+    def decode(self, path, data=None):
+        """Return a Sound for the file, from the PCM cache when it has one."""
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        if not self.cache_dir:
+            return pygame.mixer.Sound(file=io.BytesIO(data))
+        cache_path = self._cache_path(data)
+        try:
+            with open(cache_path, 'rb') as f:
+                sound = pygame.mixer.Sound(buffer=f.read())
+            self.cache_hits += 1
+            return sound
+        except FileNotFoundError:
+            pass
+        sound = pygame.mixer.Sound(file=io.BytesIO(data))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(sound.get_raw())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            log.warning("could not cache decoded %s: %s", path, e)
+        return sound
+
+    def add(self, name, sound):
+        self.sounds[name] = sound
+
+    def __contains__(self, name):
+        return name in self.sounds
+
+    def __getitem__(self, name):
+        return Cue(self, name)
+
+    # Playing
+
+    def play(self, name):
+        """Play an effect on a free channel of its category. Returns False if dropped."""
+        sound = self.sounds.get(name)
+        category, min_interval = self.effects.get(name, (None, 0.0))
+        now = time.monotonic()
+        if sound is None or now - self._last_played.get(name, -math.inf) < min_interval:
+            self.dropped[name] += 1
+            return False
+        channels = self.channels.get(category)
+        if channels is None:
+            channel = sound.play()  # no category: any unreserved channel
+        else:
+            channel = next((channel for channel in channels if not channel.get_busy()), None)
+            if channel is not None:
+                channel.play(sound)
+        if channel is None:
+            self.dropped[name] += 1
+            return False
+        self._last_played[name] = now
+        self.played[name] += 1
+        return True
+
+    def stats(self):
+        return {name: (self.played[name], self.dropped[name])
+                for name in sorted(set(self.played) | set(self.dropped))}
+
@@ -0,0 +1,82 @@
+"""Sprite cache: every image is decoded and converted once.
+
+Surfaces are keyed by (asset, size, alpha). The first request for a size
+decodes the file (or reuses the cached full-size surface) and scales it,
+and later requests get the same Surface back. Entries are evicted least
+recently used first once the pixel memory goes over max_bytes.
+
+With an AssetBundle (bundle.py) a miss is served from the bundle's
+pre-scaled pixels first, and only decodes the PNG when it has none.
+"""
+import os
+from collections import OrderedDict
+
+import pygame
+
+
+class SpriteCache:
+    def __init__(self, root='assets', max_bytes=64 * 1024 * 1024, bundle=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.bundle = bundle
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._surfaces = OrderedDict()
+
+    @staticmethod
+    def _size_of(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def _store(self, key, surface):
+        self._surfaces[key] = surface
+        self.bytes += self._size_of(surface)
+        while self.bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, evicted = self._surfaces.popitem(last=False)
+            self.bytes -= self._size_of(evicted)
+            self.evictions += 1
+
+    def get(self, name, size=None, alpha=True):
+        """Return the asset as a display-format Surface, scaled to size if given."""
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (name, size, alpha)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        if self.bundle is not None:
+            surface = self.bundle.surface(name, size, alpha)
+            if surface is not None:
+                self._store(key, surface)
+                return surface
+        if size is None:
+            image = pygame.image.load(os.path.join(self.root, name))
+            surface = image.convert_alpha() if alpha else image.convert()
+        else:
+            base = self.get(name, None, alpha)
+            surface = base if base.get_size() == size else pygame.transform.scale(base, size)
+        self._store(key, surface)
+        return surface
+
+    def add(self, name, image, alpha=True):
+        """Convert an already decoded image and cache it as the full-size asset."""
+        surface = image.convert_alpha() if alpha else image.convert()
+        self._store((name, None, alpha), surface)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._surfaces),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,227 @@
+"""Parameter sweeps over headless sessions, spread across a process pool.
+
+Every combination of the given values is a point, and every point is played
+by the same run of seeds so points differ only in their rules:
+
+    python sweep.py --param gravity=7,9.8,12 --param spawn_interval=60,90,120 \\
+        --sessions 20 --out sweep.jsonl
+
+--random N plays N points drawn from the values instead of the whole grid,
+and there a value written lo..hi is drawn uniformly from that range
+(except bird_speed, whose values are already low:high pairs):
+
+    python sweep.py --random 50 --param gravity=5..15 --param bird_speed=2:5,3:7
+
+The parameters are the fields of simulation.Config: gravity,
+powerup_duration, bird_speed (written low:high), spawn_interval and
+start_stones. Each finished session is appended to --out as one JSON line
+straight away, along with the --player, --accuracy, --tick-rate and
+--max-ticks it was played with. An interrupted sweep picks up where it
+stopped when run again with the same arguments; a run with other player
+settings plays its sessions afresh. At the end the per-point averages
+(score, hit rate, session length) go to the summary CSV.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import FPS, DEFAULT_CONFIG, Inputs
+from bot import play_session
+
+INTEGER_PARAMS = {'spawn_interval', 'start_stones'}
+
+
+class ScriptedPlayer:
+    """Sweeps the angle up and down at the starting velocity, throwing nonstop."""
+
+    def __init__(self, state, tick_rate=FPS, seed=None):
+        self.state = state
+        self.rising = True
+
+    def __call__(self):
+        state = self.state
+        if state.angle >= 80:
+            self.rising = False
+        elif state.angle <= 20:
+            self.rising = True
+        return Inputs(up=self.rising, down=not self.rising, space=True)
+
+
+PLAYERS = {'bot': None, 'scripted': ScriptedPlayer}
+
+
+def _parse_value(name, text):
+    if name == 'bird_speed':
+        # A pair already spans a range of speeds, so it has no lo..hi form
+        low, colon, high = text.partition(':')
+        if '..' in text or not colon:
+            raise ValueError(f"bird_speed values are low:high pairs such as 2:5, not {text!r}")
+        return (float(low), float(high))
+    if '..' in text:
+        low, high = text.split('..')
+        return ('range', float(low), float(high))
+    return int(text) if name in INTEGER_PARAMS else float(text)
+
+
+def parse_params(specs):
+    """Turn ['gravity=7,9.8', ...] into {'gravity': [7.0, 9.8], ...}."""
+    params = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in DEFAULT_CONFIG._fields:
+            raise ValueError(f"unknown parameter {name!r}; choose from {', '.join(DEFAULT_CONFIG._fields)}")
+        params[name] = [_parse_value(name, value) for value in values.split(',')]
+    return params
+
+
+def _draw(name, value, rng):
+    if isinstance(value, tuple) and value[0] == 'range':
+        drawn = rng.uniform(value[1], value[2])
+        return round(drawn) if name in INTEGER_PARAMS else round(drawn, 3)
+    return value
+
+
+def make_points(params, samples=None, seed=0):
+    """Return the points to play as dicts of parameter values."""
+    names = list(params)
+    if samples is None:
+        for values in params.values():
+            if any(isinstance(value, tuple) and value[0] == 'range' for value in values):
+                raise ValueError("lo..hi ranges need --random")
+        return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+    rng = random.Random(seed)
+    return [{name: _draw(name, rng.choice(params[name]), rng) for name in names} for _ in range(samples)]
+
+
+def task_key(point, seed, settings):
+    """Identify a session by its rules, its seed and how it was played."""
+    return json.dumps([point, seed, settings], sort_keys=True)
+
+
+def run_task(point, seed, settings):
+    """Play one session in a worker process."""
+    values = dict(point)
+    if 'bird_speed' in values:
+        values['bird_speed'] = tuple(values['bird_speed'])
+    stats = play_session(seed, settings['accuracy'], 'python', settings['tick_rate'], settings['max_ticks'],
+                         DEFAULT_CONFIG._replace(**values), PLAYERS[settings['player']])
+    stats['point'] = point
+    stats['settings'] = settings
+    return stats
+
+
+def load_done(path):
+    """Rows already in the results file, keyed by task.
+
+    Rows played with another player, accuracy, tick rate or tick limit get
+    different keys, so a rerun with changed settings plays them again.
+    """
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short when the last run was killed
+                done[task_key(row['point'], row['seed'], row.get('settings'))] = row
+    return done
+
+
+def summarize(rows):
+    """Aggregate session rows into one dict per point."""
+    by_point = {}
+    for row in rows:
+        by_point.setdefault(json.dumps(row['point'], sort_keys=True), []).append(row)
+    summary = []
+    for key, sessions in by_point.items():
+        throws = sum(row['throws'] for row in sessions)
+        scores = [row['score'] for row in sessions]
+        summary.append({
+            **json.loads(key),
+            'sessions': len(sessions),
+            'mean_score': statistics.mean(scores),
+            'median_score': statistics.median(scores),
+            'hit_rate': sum(row['hits'] for row in sessions) / throws if throws else 0.0,
+            'mean_minutes': statistics.mean(row['sim_seconds'] for row in sessions) / 60,
+            'finished': sum(row['finished'] for row in sessions) / len(sessions),
+        })
+    summary.sort(key=lambda row: row['mean_score'], reverse=True)
+    return summary
+
+
+def write_summary(path, summary):
+    if not summary:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(summary[0]))
+        writer.writeheader()
+        for row in summary:
+            writer.writerow({name: ':'.join(map(str, value)) if isinstance(value, list) else value
+                             for name, value in row.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep Pigeons! rules over headless sessions.")
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                        help="values for one Config field; repeat for more fields")
+    parser.add_argument('--random', type=int, metavar='N', help="play N random points instead of the grid")
+    parser.add_argument('--sessions', type=int, default=10, help="sessions per point")
+    parser.add_argument('--seed', type=int, default=0, help="first session seed, and the point sampler's")
+    parser.add_argument('--player', choices=list(PLAYERS), default='bot')
+    parser.add_argument('--accuracy', type=float, default=0.8, help="bot accuracy")
+    parser.add_argument('--tick-rate', type=int, default=FPS)
+    parser.add_argument('--max-ticks', type=int,
+                        help="cut a session off after this many ticks (default: 600 simulated seconds "
+                             "at the tick rate)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', default='sweep.jsonl')
+    parser.add_argument('--summary', help="summary CSV (default: next to --out)")
+    args = parser.parse_args(argv)
+    if args.max_ticks is None:
+        args.max_ticks = 600 * args.tick_rate
+
+    try:
+        points = make_points(parse_params(args.param), args.random, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    settings = {'player': args.player, 'accuracy': args.accuracy,
+                'tick_rate': args.tick_rate, 'max_ticks': args.max_ticks}
+    tasks = [(point, seed) for point in points
+             for seed in range(args.seed, args.seed + args.sessions)]
+    done = load_done(args.out)
+    todo = [(point, seed) for point, seed in tasks if task_key(point, seed, settings) not in done]
+    print(f"{len(points)} points, {len(tasks)} sessions, {len(tasks) - len(todo)} already done")
+
+    start = time.perf_counter()
+    with open(args.out, 'a') as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_task, point, seed, settings) for point, seed in todo]
+        for finished, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            out.write(json.dumps(row) + '\n')
+            out.flush()
+            done[task_key(row['point'], row['seed'], settings)] = row
+            if finished % 50 == 0 or finished == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"{finished}/{len(todo)} sessions, {finished / elapsed:.1f}/s")
+
+    # JSON turns the point's tuples into lists, so match on the key
+    keys = {task_key(point, seed, settings) for point, seed in tasks}
+    summary = summarize(row for key, row in done.items() if key in keys)
+    summary_path = args.summary or os.path.splitext(args.out)[0] + '.summary.csv'
+    write_summary(summary_path, summary)
+    for row in summary[:10]:
+        print(row)
+    print(f"summary written to {summary_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Cached text rendering.
+
+TextCache keeps rendered surfaces keyed by (font, text, color, antialias) and
+drops the least recently used once it holds max_entries. BoundText sits on
+top of it for HUD lines: it remembers the last value it was given and only
+formats and looks up a new surface when that value changes.
+"""
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class BoundText:
+    """A line of text that re-renders only when its bound value changes."""
+
+    def __init__(self, cache, font, fmt, color):
+        self.cache = cache
+        self.font = font
+        self.fmt = fmt
+        self.color = color
+        self._value = object()
+        self.surface = None
+
+    def update(self, *value):
+        if value != self._value:
+            self._value = value
+            self.surface = self.cache.render(self.font, self.fmt.format(*value), self.color)
+        return self.surface
@@ -0,0 +1,43 @@
+"""Fixed-timestep accumulator that decouples physics from the render rate.
+
+Each rendered frame hands the real elapsed time to advance(), which says how
+many fixed physics ticks to run. Whatever is left over becomes `alpha`, the
+fraction of a tick the renderer should interpolate by. A frame that took
+longer than max_elapsed seconds (a hitch, a dragged window, a debugger
+pause) only counts as max_elapsed, so the backlog is dropped instead of
+snowballing into ever slower frames; dropped_time adds up the simulation
+seconds lost that way. The cap is on time rather than on ticks, so a low
+render rate or a high time scale still runs every tick it is due.
+"""
+from simulation import FPS
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate=FPS, max_elapsed=0.25, time_scale=1.0):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_elapsed = max_elapsed
+        self.time_scale = time_scale
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def advance(self, elapsed):
+        """Add elapsed real seconds and return how many ticks are due."""
+        if elapsed > self.max_elapsed:
+            self.dropped_time += (elapsed - self.max_elapsed) * self.time_scale
+            elapsed = self.max_elapsed
+        self.accumulator += elapsed * self.time_scale
+        steps = int(self.accumulator / self.dt)
+        self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+def lerp(previous, current, alpha):
+    return previous + (current - previous) * alpha
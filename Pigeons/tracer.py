@@ -0,0 +1,123 @@
+"""Aiming tracer points, memoized by (angle, velocity).
+
+Angle and velocity are whole numbers clamped to 1-90 and 10-150, so there are
+only 12,690 distinct tracers. Each one is sampled once, with the step where it
+leaves the screen solved from the trajectory equation instead of by walking
+along it, and then served from an LRU cache. precompute_tracers() fills the
+whole table up front for kiosks that would rather pay at startup.
+"""
+import math
+from functools import lru_cache
+
+from simulation import WIDTH, HEIGHT, GRAVITY, boy_pos
+
+TRACER_STEP = 0.05  # flight time between tracer samples
+DOT_EVERY = 7  # draw a dot on every seventh sample
+TRACER_CACHE_SIZE = 512
+
+_table = {}
+
+
+def _position(x0, y0, vx, vy, t):
+    return x0 + vx * t, y0 - (vy * t - 0.5 * GRAVITY * t ** 2)
+
+
+def _off_screen(x, y):
+    return x > WIDTH or y > HEIGHT or y < 0
+
+
+def tracer_exit_step(angle, velocity):
+    """Return the index of the first sample that falls off the screen."""
+    x0 = boy_pos[0] + 90
+    y0 = boy_pos[1] + 7
+    rad = math.radians(angle)
+    vx = velocity * math.cos(rad)
+    vy = velocity * math.sin(rad)
+
+    # y(t) = y0 - vy*t + g/2*t^2 crosses HEIGHT exactly once going down
+    a = 0.5 * GRAVITY
+    exit_time = (vy + math.sqrt(vy * vy - 4 * a * (y0 - HEIGHT))) / (2 * a)
+    # ... and goes above the top edge only if the apex clears it
+    top = vy * vy - 4 * a * y0
+    if top > 0:
+        exit_time = min(exit_time, (vy - math.sqrt(top)) / (2 * a))
+    if vx > 1e-9:
+        exit_time = min(exit_time, (WIDTH - x0) / vx)
+
+    # Land just before the crossing and let the exact test settle rounding
+    step = max(0, int(exit_time / TRACER_STEP) - 1)
+    while step > 0 and _off_screen(*_position(x0, y0, vx, vy, (step - 1) * TRACER_STEP)):
+        step -= 1
+    while not _off_screen(*_position(x0, y0, vx, vy, step * TRACER_STEP)):
+        step += 1
+    return step
+
+
+def _sample(angle, velocity):
+    x0 = boy_pos[0] + 90
+    y0 = boy_pos[1] + 7
+    rad = math.radians(angle)
+    vx = velocity * math.cos(rad)
+    vy = velocity * math.sin(rad)
+    points = []
+    for step in range(tracer_exit_step(angle, velocity)):
+        x, y = _position(x0, y0, vx, vy, step * TRACER_STEP)
+        points.append((int(x), int(y)))
+    return tuple(points)
+
+
+@lru_cache(maxsize=TRACER_CACHE_SIZE)
+def _cached(angle, velocity):
+    return _sample(angle, velocity)
+
+
+def tracer_points(angle, velocity):
+    """Return the on-screen tracer samples for a throw as (x, y) pixels."""
+    points = _table.get((angle, velocity))
+    if points is None:
+        points = _cached(angle, velocity)
+    return points
+
+
+@lru_cache(maxsize=TRACER_CACHE_SIZE)
+def tracer_dots(angle, velocity, scale=1.0):
+    """Return the (x, y, alpha) dots the renderer draws for a throw.
+
+    scale maps the dots onto a view drawn at a lower resolution.
+    """
+    points = tracer_points(angle, velocity)
+    return tuple(
+        (int(x * scale), int(y * scale), max(0, 180 - int(120 * (i / len(points)))))
+        for i, (x, y) in enumerate(points)
+        if i % DOT_EVERY == 0
+    )
+
+
+@lru_cache(maxsize=TRACER_CACHE_SIZE)
+def tracer_bounds(angle, velocity, dot_radius=6, scale=1.0):
+    """Return the (left, top, width, height) box covering every dot, or None."""
+    dots = tracer_dots(angle, velocity, scale)
+    if not dots:
+        return None
+    xs = [x for x, _, _ in dots]
+    ys = [y for _, y, _ in dots]
+    left = min(xs) - dot_radius
+    top = min(ys) - dot_radius
+    return left, top, max(xs) + dot_radius - left, max(ys) + dot_radius - top
+
+
+@lru_cache(maxsize=TRACER_CACHE_SIZE)
+def dots_overlap(angle, velocity, dot_radius=6, scale=1.0):
+    """True if any two neighbouring dots of the tracer overlap."""
+    dots = tracer_dots(angle, velocity, scale)
+    reach = (2 * dot_radius) ** 2
+    return any((x1 - x0) ** 2 + (y1 - y0) ** 2 < reach
+               for (x0, y0, _), (x1, y1, _) in zip(dots, dots[1:]))
+
+
+def precompute_tracers(angles=range(1, 91), velocities=range(10, 151)):
+    """Sample every tracer in the given ranges into a permanent table."""
+    for angle in angles:
+        for velocity in velocities:
+            _table[(angle, velocity)] = _sample(angle, velocity)
+    return len(_table)
@@ -0,0 +1,71 @@
+"""Tracer rendering without per-frame allocations.
+
+The dot sprite is drawn once for each alpha the tracer uses and kept. When
+no two dots of a tracer overlap they are blitted straight onto the target.
+Slow throws put the dots close enough to overlap, and blending those one by
+one onto the target would round differently from blending them together
+first, so they go onto one persistent SRCALPHA layer instead. Only the
+tracer's bounding box of that layer is cleared and redrawn, and only when
+the aim changed. Either way the pixels are the same as drawing every dot
+onto a fresh transparent surface each frame.
+
+scale places the dots for a view drawn at a lower resolution (see
+renderscale.py); radius is in view pixels.
+"""
+import pygame
+
+from tracer import tracer_dots, tracer_bounds, dots_overlap
+
+
+class TracerLayer:
+    def __init__(self, size, radius=6, scale=1.0):
+        self.size = size
+        self.radius = radius
+        self.scale = scale
+        self.surface = None
+        self._dots = {}
+        self._key = None
+        self._bounds = None
+        self.redraws = 0
+
+    def dot(self, alpha):
+        """The dot sprite at this alpha, drawn the first time it is asked for."""
+        sprite = self._dots.get(alpha)
+        if sprite is None:
+            diameter = self.radius * 2
+            sprite = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (255, 255, 255, alpha), (self.radius, self.radius), self.radius)
+            self._dots[alpha] = sprite
+        return sprite
+
+    def _blits(self, angle, velocity):
+        radius = self.radius
+        return [(self.dot(alpha), (x - radius, y - radius)) for x, y, alpha in tracer_dots(angle, velocity, self.scale)]
+
+    def render(self, angle, velocity):
+        """Bring the layer up to date for this aim and return the box to blit, or None."""
+        key = (angle, velocity)
+        if key == self._key:
+            return self._bounds
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        elif self._bounds:
+            self.surface.fill((0, 0, 0, 0), self._bounds)
+        bounds = tracer_bounds(angle, velocity, self.radius, self.scale)
+        if bounds:
+            self.surface.blits(self._blits(angle, velocity), doreturn=False)
+        self._key = key
+        self._bounds = bounds
+        self.redraws += 1
+        return bounds
+
+    def draw(self, target, angle, velocity):
+        """Draw the tracer onto target and return the Rect it covers, or None."""
+        bounds = tracer_bounds(angle, velocity, self.radius, self.scale)
+        if not bounds:
+            return None
+        if dots_overlap(angle, velocity, self.radius, self.scale):
+            self.render(angle, velocity)
+            return target.blit(self.surface, bounds, bounds)
+        target.blits(self._blits(angle, velocity), doreturn=False)
+        return target.get_rect().clip(bounds)